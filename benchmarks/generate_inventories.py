@@ -0,0 +1,144 @@
+'''Generates synthetic <Char>-Inventory_<server>.txt files for benchmarking'''
+
+import argparse
+import os
+import random
+
+WORN_SLOTS = [
+    'Charm', 'Ear', 'Head', 'Face', 'Ear', 'Neck', 'Shoulders', 'Arms', 'Back', 'Wrist', 'Wrist',
+    'Range', 'Hands', 'Primary', 'Secondary', 'Fingers', 'Fingers', 'Chest', 'Legs', 'Feet', 'Waist', 'Ammo'
+]
+GENERAL_BAGS = 8
+BANK_BAGS = 16
+SHAREDBANK_BAGS = 2
+BAG_SLOTS = 10
+BAG = ('Backpack', 17005)
+
+NAME_PREFIXES = ['Fungus Covered', 'Ancient', 'Rusty', 'Fine Steel', 'Blessed', 'Shadowed', 'Lord`s', "Lady's", 'Burnished', 'Crystalline']
+NAME_NOUNS = ['Scale Tunic', 'Ring', 'Dagger', 'Cloak', 'Gauntlets', 'Boots', 'Shield', 'Mask', 'Bracer', 'Earring', 'Staff', 'Tome']
+NAME_SUFFIXES = ['', ' of Ice', ' of Mastery', ' of the Ykesha', ' of Flame', ' of Swiftness']
+SPELL_NAMES = ['Gate', 'Complete Healing', 'Clarity', 'Spirit of Wolf', 'Levitate', 'Bind Affinity', 'Invisibility']
+STACKABLES = ['Bone Chips', 'Water Flask', 'Ration', 'Pearl', 'Peridot', 'Words of Mastery', 'Rune of Ice', 'Velium Bar']
+
+
+def generate_item_catalog(item_count, rng):
+    '''Returns (name, id, stackable) for item_count distinct items'''
+
+    catalog = []
+    item_ids = rng.sample(range(1001, 1001 + item_count * 20), item_count)
+    for index, item_id in enumerate(item_ids):
+        if index < len(STACKABLES):
+            catalog.append((STACKABLES[index], item_id, True))
+        elif index % 10 == 0:
+            catalog.append((f'Spell: {rng.choice(SPELL_NAMES)} {index}', item_id, False))
+        else:
+            name = f'{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_NOUNS)}{rng.choice(NAME_SUFFIXES)}'
+            catalog.append((f'{name} {index}', item_id, False))
+    return catalog
+
+
+def choose_item(catalog, rng):
+    '''Picks a catalog item, the common stackables turn up far more often than the rest'''
+    if rng.random() < 0.15:
+        return catalog[rng.randrange(min(len(STACKABLES), len(catalog)))]
+    return rng.choice(catalog)
+
+
+def item_row(location, item, rng):
+    '''Formats one inventory row for a catalog item'''
+    name, item_id, stackable = item
+    count = rng.randint(1, 20) if stackable else 1
+    return f'{location}\t{name}\t{item_id}\t{count}\t0'
+
+
+def container_rows(location_prefix, bags, items_left, catalog, rng):
+    '''Rows for a set of bags, filling slots until items_left runs out, returns (rows, items_left)'''
+
+    rows = []
+    for bag in range(1, bags + 1):
+        bag_location = f'{location_prefix}{bag}'
+        if items_left <= 0:
+            rows.append(f'{bag_location}\tEmpty\t0\t0\t0')
+            continue
+        rows.append(f'{bag_location}\t{BAG[0]}\t{BAG[1]}\t1\t{BAG_SLOTS}')
+        for slot in range(1, BAG_SLOTS + 1):
+            slot_location = f'{bag_location}-Slot{slot}'
+            if items_left > 0:
+                rows.append(item_row(slot_location, choose_item(catalog, rng), rng))
+                items_left -= 1
+            else:
+                rows.append(f'{slot_location}\tEmpty\t0\t0\t0')
+    return rows, items_left
+
+
+def inventory_text(items_per_character, sharedbank_items, catalog, rng):
+    '''Builds the contents of one inventory file'''
+
+    rows = ['Location\tName\tID\tCount\tSlots']
+    items_left = items_per_character
+    for worn_slot in WORN_SLOTS:
+        if items_left > 0 and rng.random() < 0.8:
+            rows.append(item_row(worn_slot, choose_item(catalog, rng), rng))
+            items_left -= 1
+        else:
+            rows.append(f'{worn_slot}\tEmpty\t0\t0\t0')
+    general_rows, items_left = container_rows('General', GENERAL_BAGS, items_left, catalog, rng)
+    rows += general_rows
+    rows.append(f'General-Coin\tCurrency\t0\t{rng.randint(0, 5000000)}\t0')
+    bank_rows, items_left = container_rows('Bank', BANK_BAGS, items_left, catalog, rng)
+    rows += bank_rows
+    rows.append(f'Bank-Coin\tCurrency\t0\t{rng.randint(0, 50000000)}\t0')
+    sharedbank_rows, _ = container_rows('SharedBank', SHAREDBANK_BAGS, sharedbank_items, catalog, rng)
+    rows += sharedbank_rows
+    return '\n'.join(rows) + '\n'
+
+
+def generate_inventories(output_dir, characters=60, items_per_character=250, catalog_size=5000, directories=1,
+                         servers=('pq',), account_size=0, seed=1):
+    '''Writes inventory files and returns a config that loads them, with accounts of account_size characters'''
+
+    rng = random.Random(seed)
+    catalog = generate_item_catalog(catalog_size, rng)
+    inv_directories = [os.path.join(output_dir, f'eq{index + 1}') for index in range(directories)]
+    for inv_directory in inv_directories:
+        os.makedirs(inv_directory, exist_ok=True)
+
+    accounts = {}
+    for index in range(characters):
+        character = f'Char{index:03d}'
+        server = servers[index % len(servers)]
+        file_path = os.path.join(inv_directories[index % directories], f'{character}-Inventory_{server}.txt')
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.write(inventory_text(items_per_character, rng.randint(0, SHAREDBANK_BAGS * BAG_SLOTS), catalog, rng))
+        if account_size:
+            accounts.setdefault(f'Account{index // account_size:03d}', []).append(character)
+
+    return {
+        'accounts': accounts,
+        'ignoredCharacters': [],
+        'invDirectories': inv_directories,
+        'showItemIDs': False,
+        'sortCharacters': False,
+        'showServerNames': False
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic EQ inventory files')
+    parser.add_argument('output_dir', help='Directory to write the inventory directories into')
+    parser.add_argument('--characters', type=int, default=60)
+    parser.add_argument('--items', type=int, default=250, help='Filled slots per character')
+    parser.add_argument('--catalog', type=int, default=5000, help='Distinct items to choose from')
+    parser.add_argument('--directories', type=int, default=1)
+    parser.add_argument('--servers', default='pq', help='Comma separated server names')
+    parser.add_argument('--account-size', type=int, default=0, help='Characters per shared bank account, 0 for none')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    config = generate_inventories(args.output_dir, args.characters, args.items, args.catalog, args.directories,
+                                  args.servers.split(','), args.account_size, args.seed)
+    print('\n'.join(config['invDirectories']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+'''Times loading, reloading and searching synthetic inventories, prints the results as JSON'''
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from generate_inventories import generate_inventories  # noqa: E402
+from inventory import CACHE_FILE, RESULT_ORDERS, InventoryCache, SearchIndex, find_items, publish_load_result, total_found_count  # noqa: E402
+from regex_worker import RegexWorker, SearchTooExpensive  # noqa: E402
+
+TYPICAL_QUERIES = ['Words of', 'rune of ice', 'Spell: Gate', 'Lord`s', '17005', 'Ring char:Char001', 'loc:SharedBank count>5']
+ORDERED_QUERIES = ['Words of', 'e', 'loc:SharedBank']
+FUZZY_QUERIES = ['Wrds of Mastry', 'Runne of Ice', 'Cristalline Dager', 'Gate']
+PATHOLOGICAL_QUERIES = ['a', 'e', '1', 'zzzzzzzzzz', '^.*e.*e.*e.*$', '(a|e|i|o|u)+s', 'NOT zzz', 'e OR a NOT loc:worn']
+REGEX_WORKER_QUERIES = ['^.*e.*e.*e.*$', '(a|e|i|o|u)+s', 'name:"^s.*e$" count>5', '(.|.)*!']  # The last backtracks forever
+WORKER_START_TIMEOUT_MS = 15000  # The worker process starts in the background, searches are only timed once it is ready
+
+
+def get_version():
+    '''Reads VERSION from eqInvSearch.py without importing Qt'''
+    with open(os.path.join(REPO_DIR, 'eqInvSearch.py'), encoding='utf-8') as file:
+        version = re.search(r'^VERSION = "(.*)"', file.read(), re.MULTILINE)
+    return version.group(1) if version else None
+
+
+def timed(function, *args, **kwargs):
+    '''Runs function, returns its result and the elapsed milliseconds'''
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def timing_summary(timings):
+    '''Summarizes repeated timings in milliseconds'''
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3)
+    }
+
+
+def load(inventory_cache, config, inventory, search_index=None, rebuild=False):
+    '''Loads changes like the GUI does, returns the new inventory and search index'''
+    load_result = inventory_cache.load_changes(config, inventory, rebuild=rebuild)
+    inventory, search_index = publish_load_result(inventory, search_index, config, load_result)
+    return inventory, search_index, load_result
+
+
+def benchmark_loads(config, cache_dir):
+    '''Times a cold load, a cached startup, a warm reload and a single file update'''
+
+    results = {}
+    cache_file_path = os.path.join(cache_dir, CACHE_FILE)
+
+    # Peak memory of a load without the cache, measured separately as tracing slows everything down
+    tracemalloc.start()
+    inventory, _, _ = load(InventoryCache(), config, {})
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results['memory'] = {'peak_bytes': peak_memory, 'items': len(inventory),
+                         'entries': sum(len(item.entries) // 3 for item in inventory.values())}
+
+    # Cold load parses every file and writes the cache
+    inventory_cache = InventoryCache(cache_file_path)
+    (inventory, search_index, load_result), elapsed = timed(load, inventory_cache, config, {})
+    results['cold_load'] = {'ms': round(elapsed, 3), 'files': len(load_result['inventoryFiles']), 'items': len(inventory)}
+
+    # Cached startup restores the inventory and search index saved with the parsed files, with nothing to apply to them
+    (_, _, startup_result), elapsed = timed(load, InventoryCache(cache_file_path), config, {})
+    results['cached_startup'] = {'ms': round(elapsed, 3), 'restored_items': startup_result['timings']['details']['restoredItems']}
+
+    # Warm reload has nothing to parse or apply
+    (inventory, search_index, load_result), elapsed = timed(load, inventory_cache, config, inventory, search_index)
+    results['warm_reload'] = {'ms': round(elapsed, 3), 'updated_items': len(load_result['updatedItems'])}
+
+    # Single file update touches one inventory file so it is parsed and re-applied
+    inventory_file = load_result['inventoryFiles'][0]
+    inventory_file_path = inventory_file['path']
+    file_stat = os.stat(inventory_file_path)
+    os.utime(inventory_file_path, (file_stat.st_atime, file_stat.st_mtime + 1))
+    (inventory, search_index, load_result), elapsed = timed(load, inventory_cache, config, inventory, search_index)
+    results['single_file_update'] = {'ms': round(elapsed, 3), 'updated_items': len(load_result['updatedItems'])}
+
+    # Rebuild discards the cache and parses everything again
+    (inventory, search_index, _), elapsed = timed(load, inventory_cache, config, inventory, search_index, True)
+    results['rebuild'] = {'ms': round(elapsed, 3)}
+
+    return inventory, search_index, results
+
+
+def benchmark_searches(inventory, search_index, queries, repeats, fuzzy=False, order='id'):
+    '''Times each query through a fresh search index, so narrowing does not skew results'''
+
+    results = {}
+    for query in queries:
+        timings = []
+        for _ in range(repeats):
+            search_index.last_search = None
+            (found_items, _), elapsed = timed(find_items, inventory, search_index, query, fuzzy=fuzzy, order=order)
+            timings.append(elapsed)
+        results[query] = dict(timing_summary(timings), matches=len(found_items))
+    return results
+
+
+def benchmark_regex_worker(inventory, search_index, queries, repeats):
+    '''Times regex queries run in the worker process as the GUI does, including how long a runaway regex takes to be stopped'''
+
+    search_index.regex_worker = RegexWorker()
+    search_index.regex_worker.wait_started(WORKER_START_TIMEOUT_MS)
+    find_items(inventory, search_index, queries[0])  # Send the worker the names first
+    results = {}
+    for query in queries:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            try:
+                found_items, _ = find_items(inventory, search_index, query)
+            except SearchTooExpensive:
+                found_items = None
+            timings.append((time.perf_counter() - start) * 1000)
+            search_index.regex_worker.wait_started(WORKER_START_TIMEOUT_MS)  # A stopped worker is replaced before the next search
+        results[query] = dict(timing_summary(timings), matches=None if found_items is None else len(found_items),
+                              too_expensive=found_items is None)
+    search_index.regex_worker.stop()
+    search_index.regex_worker = None
+    return results
+
+
+def benchmark_index(inventory, repeats):
+    '''Times building the search index from scratch'''
+
+    updated_items = dict(inventory)
+    timings = [timed(SearchIndex().update, updated_items)[1] for _ in range(repeats)]
+    return timing_summary(timings)
+
+
+def benchmark_render(inventory, search_index, queries, repeats):
+    '''Times filling the results model and walking every row, when PySide6 is available'''
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PySide6.QtGui import QFont
+        from PySide6.QtWidgets import QApplication
+        from eqInvSearch import SearchResultsModel
+    except ImportError:
+        return None
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    model = SearchResultsModel(QFont('Monospace'))
+
+    def render(found_items):
+        model.set_results(found_items, 'All', False, total_found_count(search_index, found_items), len(found_items),
+                          search_index.character_view)
+        rows = 0
+        pending = [model.index(row, 0) for row in range(model.rowCount())]
+        while pending:
+            index = pending.pop()
+            model.data(index)
+            rows += 1
+            pending += [model.index(row, 0, index) for row in range(model.rowCount(index))]
+        return rows
+
+    results = {}
+    for query in queries:
+        found_items, _ = find_items(inventory, search_index, query)
+        timings = []
+        for _ in range(repeats):
+            rows, elapsed = timed(render, found_items)
+            timings.append(elapsed)
+        results[query] = dict(timing_summary(timings), rows=rows)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark eqInvSearch against synthetic inventories')
+    parser.add_argument('--characters', type=int, default=60)
+    parser.add_argument('--items', type=int, default=250, help='Filled slots per character')
+    parser.add_argument('--catalog', type=int, default=5000, help='Distinct items to choose from')
+    parser.add_argument('--directories', type=int, default=1)
+    parser.add_argument('--servers', default='pq', help='Comma separated server names')
+    parser.add_argument('--account-size', type=int, default=4, help='Characters per shared bank account, 0 for none')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per search query')
+    parser.add_argument('--render', action='store_true', help='Also time the results model, needs PySide6')
+    parser.add_argument('--output', help='File to write the JSON results to, instead of stdout')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        config = generate_inventories(work_dir, args.characters, args.items, args.catalog, args.directories,
+                                      args.servers.split(','), args.account_size, args.seed)
+        cache_dir = os.path.join(work_dir, 'cache')
+        os.makedirs(cache_dir)
+
+        inventory, search_index, load_results = benchmark_loads(config, cache_dir)
+        results = {
+            'version': get_version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'render')},
+            'loads': load_results,
+            'search_index_build': benchmark_index(inventory, args.repeats),
+            'search_typical': benchmark_searches(inventory, search_index, TYPICAL_QUERIES, args.repeats),
+            'search_pathological': benchmark_searches(inventory, search_index, PATHOLOGICAL_QUERIES, args.repeats),
+            'search_fuzzy': benchmark_searches(inventory, search_index, FUZZY_QUERIES, args.repeats, fuzzy=True),
+            'search_regex_worker': benchmark_regex_worker(inventory, search_index, REGEX_WORKER_QUERIES, args.repeats),
+            'search_orders': {order: benchmark_searches(inventory, search_index, ORDERED_QUERIES, args.repeats, order=order)
+                              for order in RESULT_ORDERS}
+        }
+        if args.render:
+            results['render'] = benchmark_render(inventory, search_index, TYPICAL_QUERIES + PATHOLOGICAL_QUERIES[:2], args.repeats)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
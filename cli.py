@@ -0,0 +1,93 @@
+'''Command line interface for searching inventory files without starting the GUI'''
+
+import argparse
+import json
+import os
+import sys
+from inventory import (
+    CACHE_FILE,
+    RESULT_ORDERS,
+    SETTINGS_FILE,
+    find_items,
+    friendly_location_name,
+    get_config_dir,
+    item_id_label,
+    load_config,
+    load_inventory
+)
+
+
+def query(args):
+    '''Searches the inventory files and prints the matching items'''
+
+    config_dir = get_config_dir()
+    config = load_config(args.config or os.path.join(config_dir, SETTINGS_FILE))
+    if args.dir:
+        config['invDirectories'] = args.dir
+    # Other directories aren't loaded through the cache, which only holds the configured ones the GUI loads at startup
+    cache_file_path = None if args.no_cache or args.dir else os.path.join(config_dir, CACHE_FILE)
+
+    try:
+        inventory, load_result = load_inventory(config, cache_file_path)
+    except OSError as error:
+        print(f'Unable to read inventory files: {error}', file=sys.stderr)
+        return 2
+
+    search_index = load_result['searchIndex']
+    found_items, _ = find_items(inventory, search_index, args.search, args.char, fuzzy=args.fuzzy or config['fuzzySearch'],
+                                order=args.order or config['resultsOrder'], wildcards=args.wildcards or config['wildcardSearch'])
+
+    results = []
+    for item_id, item in found_items:
+        item_characters = search_index.character_view.characters(item)
+        if args.char != 'All':
+            item_characters = {args.char: item_characters[args.char]}
+        results.append({
+            'id': item_id,
+            'name': item.name,
+            'count': sum(character_info['count'] for character_info in item_characters.values()),
+            'characters': item_characters
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f'{result["name"]} ({item_id_label(result["id"])})\t{result["count"]}')
+            for character, character_info in result['characters'].items():
+                print(f'  {character}\t{character_info["count"]}')
+                for location, location_count in character_info['locations'].items():
+                    print(f'    {friendly_location_name(location)}\t{location_count}')
+
+    return 0 if results else 1
+
+
+def main(argv=None):
+    '''Parses command line arguments and runs the requested command'''
+
+    parser = argparse.ArgumentParser(prog='eqInvSearch', description='Search items in EQ inventory files')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    query_parser = subparsers.add_parser('query', help='Search for items by name, regex or item ID')
+    query_parser.add_argument('search', help='Item name, regex or the start of an item ID')
+    query_parser.add_argument('--char', default='All', help='Only show items held by this character')
+    query_parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    query_parser.add_argument('--dir', action='append', help='Inventory directory to search, instead of the configured ones, without the cache (repeatable)')
+    query_parser.add_argument('--config', help=f'Settings file to use, instead of {SETTINGS_FILE} in the config directory')
+    query_parser.add_argument('--fuzzy', action='store_true', help='Also find names with a few typos, closest match first')
+    query_parser.add_argument('--wildcards', action='store_true', help='Match text whose only regex characters are * and ? as wildcards')
+    query_parser.add_argument('--order', choices=RESULT_ORDERS, help='List results by item ID, name, total count or number of holders')
+    query_parser.add_argument('--no-cache', action='store_true', help='Parse every file instead of using the inventory cache')
+    query_parser.set_defaults(handler=query)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # Output piped to a command that stopped reading, like head, point stdout at devnull so exiting doesn't flush it again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+'''Records how long each phase of loading, searching and watching inventory files takes'''
+
+import logging
+import time
+from collections import deque
+
+DIAGNOSTICS_LOG_FILE = 'diagnostics.log'
+DIAGNOSTICS_LOG_MAX_BYTES = 1024 * 1024
+DIAGNOSTICS_LOG_BACKUPS = 3
+DIAGNOSTICS_HISTORY = 50  # Operations kept for the diagnostics page
+SLOWEST_FILES_SHOWN = 10
+
+logger = logging.getLogger('eqInvSearch.diagnostics')
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+class PhaseTimer:
+    '''Times the phases of one operation, each phase runs from the previous mark'''
+
+    def __init__(self, operation, started=None):
+        self.operation = operation
+        self.phases = {}
+        self.details = {}
+        self.started = time.perf_counter() if started is None else started
+        self.last_mark = self.started
+
+    def mark(self, phase):
+        '''Ends the current phase, adding the time since the previous mark to it'''
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0) + (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def record(self):
+        '''Returns the timings as a plain dict, which can be passed between threads'''
+        return {
+            'operation': self.operation,
+            'time': time.time(),
+            'totalMs': (time.perf_counter() - self.started) * 1000,
+            'phases': self.phases,
+            'details': self.details
+        }
+
+
+def format_record(record):
+    '''One line summary of an operation's timings'''
+    phases = ', '.join(f'{phase} {phase_ms:.1f}' for phase, phase_ms in record['phases'].items())
+    details = ', '.join(f'{key}={value}' for key, value in record['details'].items())
+    return f'{record["operation"]}: {record["totalMs"]:.1f} ms ({phases}) {details}'.rstrip()
+
+
+class Diagnostics:
+    '''Keeps the most recent operation timings and file parse times, optionally writing them to a rotating log'''
+
+    def __init__(self):
+        self.records = deque(maxlen=DIAGNOSTICS_HISTORY)
+        self.file_parse_times = {}  # Inventory file path to its last parse time, size and item count
+        self.log_handler = None
+
+    def add(self, record):
+        '''Adds the timings of a finished operation'''
+        self.records.append(record)
+        if self.log_handler:
+            logger.info(format_record(record))
+
+    def add_file_parse_times(self, file_parse_times):
+        '''Records the parse times of inventory files, logging each file'''
+        self.file_parse_times.update(file_parse_times)
+        if self.log_handler:
+            for file_path, parse_time in file_parse_times.items():
+                logger.info(f'parse {file_path}: {parse_time["ms"]:.1f} ms, {parse_time["size"]} bytes, {parse_time["items"]} items')
+
+    def set_log_file(self, log_file_path):
+        '''Starts writing diagnostics to a rotating log file, or stops when log_file_path is None'''
+        if self.log_handler and self.log_handler.baseFilename != log_file_path:
+            logger.removeHandler(self.log_handler)
+            self.log_handler.close()
+            self.log_handler = None
+        if log_file_path and not self.log_handler:
+            from logging.handlers import RotatingFileHandler  # Only imported when logging is turned on
+            self.log_handler = RotatingFileHandler(log_file_path, maxBytes=DIAGNOSTICS_LOG_MAX_BYTES,
+                                                   backupCount=DIAGNOSTICS_LOG_BACKUPS, encoding='utf-8')
+            self.log_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            logger.addHandler(self.log_handler)
+
+    def report(self):
+        '''Text for the diagnostics page, the latest of each operation then the slowest files to parse'''
+
+        lines = []
+        latest_records = {}
+        for record in self.records:
+            latest_records[record['operation']] = record
+        for operation, record in latest_records.items():
+            operation_times = [other['totalMs'] for other in self.records if other['operation'] == operation]
+            lines.append(f'{operation}  (last {record["totalMs"]:.1f} ms, slowest {max(operation_times):.1f} ms of {len(operation_times)})')
+            for phase, phase_ms in record['phases'].items():
+                lines.append(f'    {phase:<18}{phase_ms:>9.1f} ms')
+            for key, value in record['details'].items():
+                lines.append(f'    {key:<18}{str(value):>9}')
+
+        if self.file_parse_times:
+            lines.append(f'Slowest files to parse ({len(self.file_parse_times)} parsed)')
+            slowest_files = sorted(self.file_parse_times.items(), key=lambda file: file[1]['ms'], reverse=True)
+            for file_path, parse_time in slowest_files[:SLOWEST_FILES_SHOWN]:
+                lines.append(f'    {parse_time["ms"]:>7.1f} ms {parse_time["items"]:>6} items  {file_path}')
+
+        return '\n'.join(lines) if lines else 'Nothing has been timed yet.'
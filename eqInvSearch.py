@@ -7,13 +7,27 @@
 # nuitka-project: --windows-icon-from-ico=eqInvSearch.ico
 # nuitka-project: --include-data-file=eqInvSearch.ico=eqInvSearch.ico
 
-import os
-import re
 import sys
+
+# The command line interface doesn't use Qt, so run it before the GUI modules are imported
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == 'query':
+    from cli import main
+    sys.exit(main(sys.argv[1:]))
+
+# A frozen executable is started again as the regex worker, which doesn't use Qt either
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == '--regex-worker':
+    from regex_worker import main
+    main()
+    sys.exit()
+
+import json
+import os
 import time
-from natsort import natsorted
-import platformdirs
-from PySide6.QtCore import Qt, QTimer
+
+# Startup is timed from here, before the GUI modules are imported
+STARTUP_STARTED = time.perf_counter()
+
+from PySide6.QtCore import Qt, QAbstractItemModel, QFileSystemWatcher, QModelIndex, QObject, QRunnable, QThreadPool, QTimer, Signal
 from PySide6.QtGui import QColor, QFont, QIcon, QShortcut
 from PySide6.QtWidgets import (
     QApplication,
@@ -24,18 +38,367 @@ from PySide6.QtWidgets import (
     QMainWindow
 )
 import qdarktheme
-import yaml
+from diagnostics import DIAGNOSTICS_LOG_FILE, Diagnostics, PhaseTimer
+from inventory import (
+    CACHE_FILE,
+    RESULT_ORDERS,
+    SETTINGS_FILE,
+    CharacterView,
+    InventoryCache,
+    InventoryItem,
+    SearchIndex,
+    changed_settings,
+    configured_names,
+    find_items,
+    friendly_location_name,
+    get_config_dir,
+    inventory_file_stats,
+    item_id_label,
+    load_config,
+    publish_load_result,
+    rescan_inventory_directories,
+    save_config,
+    scan_inventory_files,
+    total_found_count
+)
 from mainWindow import Ui_MainWindow
+from regex_worker import RegexWorker, SearchStarting, SearchTooExpensive
 
-SETTINGS_FILE = 'settings.yml'
 VERSION = "0.3.0"
 
-inventory_file_re = r'^(?P<character>\w+)-Inventory(?:_(?P<server>\w+)(?:\.\w+)?)?.txt$'
+WATCHER_DEBOUNCE_MS = 500  # EQ writes inventory files in bursts, wait for them to settle before reloading
+POLL_INTERVAL_MIN_MS = 1000  # Polling is only used when change notifications are unavailable
+POLL_INTERVAL_MAX_MS = 16000
+SEARCH_DEBOUNCE_MS = 150  # Wait for typing to pause before searching
+REGEX_START_RETRY_MS = 200  # How often a regex search is tried again while the worker process starts
+RESULTS_EXPAND_LIMIT = 100  # Results are only expanded automatically when there are this many items or fewer
+RELOAD_SETTINGS = {'invDirectories', 'ignoredCharacters', 'accounts'}  # Settings that change the loaded items
+CHARACTER_VIEW_SETTINGS = {'showServerNames', 'sortCharacters'}  # Settings that change how characters are named and ordered
+RESULTS_DISPLAY_SETTINGS = ('showItemIDs', 'resultsLimit', 'showServerNames', 'sortCharacters')  # Settings result rows are built with
+
+
+class InventoryLoadSignals(QObject):
+    '''Signals used to publish inventory load results back to the GUI thread'''
+    progress = Signal(int, int)
+    finished = Signal(object)
+    failed = Signal(str)
+
 
-class IndentDumper(yaml.Dumper):
-    '''Custom YAML Dumper that provides indentation'''
-    def increase_indent(self, flow=False, indentless=False):
-        return super().increase_indent(flow, False)
+class InventoryLoader(QRunnable):
+    '''Loads inventory changes on a worker thread'''
+
+    def __init__(self, inventory_cache, config, inventory, inventory_files, rebuild=False):
+        super().__init__()
+        self.inventory_cache = inventory_cache
+        self.config = config
+        self.inventory = inventory
+        self.inventory_files = inventory_files
+        self.rebuild = rebuild
+        self.signals = InventoryLoadSignals()
+
+    def run(self):
+        # Always report back, the GUI only starts another load once this one has finished or failed
+        try:
+            load_result = self.inventory_cache.load_changes(self.config, self.inventory, self.signals.progress.emit, self.rebuild, self.inventory_files)
+        except Exception as error:
+            self.signals.failed.emit(f'{type(error).__name__}: {error}')
+            return
+        self.signals.finished.emit(load_result)
+
+
+class SearchResultNode:
+    '''A row in the search results, its children are only created once they are needed'''
+    __slots__ = ('parent', 'row', 'kind', 'label', 'count', 'source', 'children', 'item_id')
+
+    def __init__(self, parent, row, kind, label, count, source=None, item_id=None):
+        self.parent = parent
+        self.row = row
+        self.kind = kind  # item, character, location, summary or message
+        self.label = label
+        self.count = count
+        self.source = source  # Item or inventory data the children are created from
+        self.children = None
+        self.item_id = item_id  # ID of the item an item row shows, for patching results after a load
+
+
+class SearchResultsModel(QAbstractItemModel):
+    '''Tree model over the matching items, characters and locations of a search'''
+
+    item_color = QColor(255, 175, 255)
+    character_color = QColor(100, 200, 255)
+    summary_color = QColor(170, 170, 170)
+    location_backgrounds = (QColor(50, 50, 50), QColor(70, 70, 70))
+
+    def __init__(self, location_font, parent=None):
+        super().__init__(parent)
+        self.location_font = location_font
+        self.selected_char = 'All'
+        self.show_item_ids = False
+        self.character_view = CharacterView()  # How the characters holding each item are named and ordered
+        self.found_items = []  # Every match, item rows are only created for the ones shown so far
+        self.batch_size = 0
+        self.rows = []
+        self.updating = False  # Set while rows are patched, the view can't fetch more rows in the middle of that
+
+    def set_results(self, found_items, selected_char, show_item_ids, total_count, batch_size, character_view):
+        '''Replaces the results with (item_id, item) pairs searched for the selected character, showing batch_size items at first'''
+
+        self.beginResetModel()
+        self.selected_char = selected_char
+        self.show_item_ids = show_item_ids
+        self.character_view = character_view
+        self.found_items = found_items
+        self.batch_size = batch_size
+        if found_items:
+            # The summary row counts every match, not just the ones shown
+            self.rows = [SearchResultNode(None, 0, 'summary', '', total_count)]
+            self.add_item_rows(batch_size)
+            self.update_summary()
+        else:
+            self.rows = [SearchResultNode(None, 0, 'message', 'No matching items found.', None)]
+        self.endResetModel()
+
+    def add_item_rows(self, row_count):
+        '''Creates rows for the next row_count found items'''
+
+        shown_count = len(self.rows) - 1
+        for item_id, item in self.found_items[shown_count:shown_count + row_count]:
+            self.rows.append(self.item_node(len(self.rows), item_id, item))
+
+    def item_label(self, item_id, item):
+        '''Text of an item row'''
+        return f'{item.name} ({item_id_label(item_id)})' if self.show_item_ids else item.name
+
+    def item_count(self, item):
+        '''Count of an item row, the grand total when searching all characters or the selected character's total'''
+        if self.selected_char == 'All':
+            return item.total_count
+        return self.character_view.character_counts(item)[self.selected_char]
+
+    def item_node(self, row, item_id, item):
+        '''Creates an item row, with character rows when searching all characters or location rows for a single character'''
+        return SearchResultNode(None, row, 'item', self.item_label(item_id, item), self.item_count(item), item, item_id)
+
+    def update_results(self, found_items, total_count, updated_items):
+        '''Patches the results of the same search after a load, only touching rows of items that were added, removed, moved or changed
+
+        Rows are removed, moved and inserted rather than the model being reset, so the view keeps expanded rows, the selection
+        and the scroll position.
+        '''
+
+        self.updating = True
+        self.found_items = found_items
+        # Keep showing as many items as before, at least a batch of them
+        shown_count = min(max(len(self.rows) - 1, self.batch_size), len(found_items))
+        shown_items = dict(found_items[:shown_count])
+        self.arrange_rows(QModelIndex(), self.rows, [None] + list(shown_items), lambda node: node.item_id,
+                          lambda row, item_id: self.item_node(row, item_id, shown_items[item_id]))
+
+        # Rows just inserted already show the new item, other rows of changed items are updated in place
+        for node in self.rows[1:]:
+            item = shown_items[node.item_id]
+            if node.item_id not in updated_items or node.source is item:
+                continue
+            node.label = self.item_label(node.item_id, item)
+            node.count = self.item_count(item)
+            node.source = item
+            if node.children is not None:
+                self.update_children(self.createIndex(node.row, 0, node), node, self.node_source(node))
+            self.dataChanged.emit(self.createIndex(node.row, 0, node), self.createIndex(node.row, 1, node))
+
+        self.rows[0].count = total_count
+        self.update_summary()
+        self.updating = False
+        self.dataChanged.emit(self.index(0, 0), self.index(0, 1))
+
+    def update_children(self, parent_index, node, source):
+        '''Patches the character or location rows of a node to its new inventory data, matching rows up by their label'''
+
+        if node.kind == 'item' and self.selected_char == 'All':
+            children = {character: (character_info['count'], character_info['locations']) for character, character_info in source.items()}
+            kind = 'character'
+        else:
+            children = {location: (location_count, None) for location, location_count in source.items()}
+            kind = 'location'
+        self.arrange_rows(parent_index, node.children, list(children), lambda child: child.label,
+                          lambda row, label: SearchResultNode(node, row, kind, label, *children[label]))
+
+        for child in node.children:
+            count, child_source = children[child.label]
+            if child.count != count:
+                child.count = count
+                self.dataChanged.emit(self.createIndex(child.row, 1, child), self.createIndex(child.row, 1, child))
+            if kind == 'character' and child.source is not child_source:
+                child.source = child_source
+                if child.children is not None:
+                    self.update_children(self.createIndex(child.row, 0, child), child, child_source)
+
+    def arrange_rows(self, parent_index, rows, keys, row_key, create_node):
+        '''Removes, moves and inserts rows until their keys are keys in order, the nodes of rows that stay are kept'''
+
+        wanted_keys = set(keys)
+        for row in range(len(rows) - 1, -1, -1):
+            if row_key(rows[row]) not in wanted_keys:
+                self.beginRemoveRows(parent_index, row, row)
+                del rows[row]
+                self.number_rows(rows, row)
+                self.endRemoveRows()
+
+        for position, key in enumerate(keys):
+            if position < len(rows) and row_key(rows[position]) == key:
+                continue
+            source_row = next((row for row in range(position + 1, len(rows)) if row_key(rows[row]) == key), None)
+            if source_row is None:
+                self.beginInsertRows(parent_index, position, position)
+                rows.insert(position, create_node(position, key))
+                self.number_rows(rows, position)
+                self.endInsertRows()
+            else:
+                self.beginMoveRows(parent_index, source_row, source_row, parent_index, position)
+                rows.insert(position, rows.pop(source_row))
+                self.number_rows(rows, position)
+                self.endMoveRows()
+
+    def number_rows(self, rows, start):
+        '''Renumbers rows from start after one has been added, removed or moved'''
+        for row in range(start, len(rows)):
+            rows[row].row = row
+
+    def update_summary(self):
+        '''Updates the summary row with how many of the matching items are shown'''
+
+        shown_count = len(self.rows) - 1
+        match_count = len(self.found_items)
+        item_word = 'item' if match_count == 1 else 'items'
+        if shown_count < match_count:
+            self.rows[0].label = f'Showing {shown_count:,} of {match_count:,} matching {item_word}, click or scroll for more'
+        else:
+            self.rows[0].label = f'{match_count:,} matching {item_word}'
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.updating:
+            return False
+        return 0 < len(self.rows) - 1 < len(self.found_items)
+
+    def fetchMore(self, parent=QModelIndex()):
+        '''Shows the next batch of found items, the view calls this when scrolled to the end'''
+
+        if not self.canFetchMore(parent):
+            return
+        shown_count = len(self.rows) - 1
+        row_count = min(self.batch_size, len(self.found_items) - shown_count)
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + row_count - 1)
+        self.add_item_rows(row_count)
+        self.endInsertRows()
+        self.update_summary()
+        self.dataChanged.emit(self.index(0, 0), self.index(0, 1))
+
+    def set_message(self, message):
+        '''Replaces the results with a single message row'''
+        self.beginResetModel()
+        self.found_items = []
+        self.rows = [SearchResultNode(None, 0, 'message', message, None)]
+        self.endResetModel()
+
+    def clear_results(self):
+        '''Removes all rows'''
+        self.beginResetModel()
+        self.found_items = []
+        self.rows = []
+        self.endResetModel()
+
+    def node_source(self, node):
+        '''Returns the inventory data a node's children are created from, unpacking the item the first time'''
+
+        if isinstance(node.source, InventoryItem):
+            item_characters = self.character_view.characters(node.source)
+            if self.selected_char == 'All':
+                node.source = item_characters
+            else:
+                node.source = item_characters[self.selected_char]['locations']
+        return node.source
+
+    def node_children(self, node):
+        '''Creates the child rows of a node the first time they are needed'''
+
+        if node.children is None:
+            node.children = []
+            if node.kind == 'item' and self.selected_char == 'All':
+                for character, character_info in self.node_source(node).items():
+                    node.children.append(SearchResultNode(node, len(node.children), 'character', character, character_info['count'], character_info['locations']))
+            elif node.kind in ('item', 'character'):
+                for location, location_count in self.node_source(node).items():
+                    node.children.append(SearchResultNode(node, len(node.children), 'location', location, location_count))
+        return node.children
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid():
+            rows = self.node_children(parent.internalPointer())
+        else:
+            rows = self.rows
+        if row < 0 or row >= len(rows) or column < 0 or column > 1:
+            return QModelIndex()
+        return self.createIndex(row, column, rows[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent_node = index.internalPointer().parent
+        if parent_node is None:
+            return QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        if not parent.isValid():
+            return len(self.rows)
+        node = parent.internalPointer()
+        if node.kind in ('location', 'summary', 'message'):
+            return 0
+        if node.children is not None:
+            return len(node.children)
+        # Children are counted from the inventory data without creating them
+        return len(self.node_source(node))
+
+    def columnCount(self, parent=QModelIndex()):
+        return 2
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return friendly_location_name(node.label) if node.kind == 'location' else node.label
+            return str(node.count) if node.count is not None else None
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if node.kind == 'item':
+                return self.item_color
+            if node.kind == 'character':
+                return self.character_color
+            if node.kind == 'summary':
+                return self.summary_color
+        elif role == Qt.ItemDataRole.BackgroundRole:
+            if node.kind == 'location':
+                return self.location_backgrounds[node.row % 2]
+        elif role == Qt.ItemDataRole.FontRole:
+            if node.kind == 'location' and column == 0:
+                return self.location_font
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            if column == 1:
+                return Qt.AlignmentFlag.AlignRight
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation != Qt.Orientation.Horizontal:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return 'Quantity' if section == 1 else ''
+        if role == Qt.ItemDataRole.TextAlignmentRole and section == 1:
+            return Qt.AlignmentFlag.AlignCenter
+        return None
 
 
 class MainWindow(QMainWindow):
@@ -43,67 +406,119 @@ class MainWindow(QMainWindow):
 
     def load_config(self):
         '''Load config from file'''
-
-        if os.path.isfile(self.config_file_path):
-            with open(self.config_file_path, 'r', encoding='utf-8') as yml_file:
-                self.config = yaml.safe_load(yml_file)
-        if not self.config:
-            self.config = {}
-        if 'accounts' not in self.config:
-            self.config['accounts'] = {}
-        if 'ignoredCharacters' not in self.config:
-            self.config['ignoredCharacters'] = []
-        if 'invDirectories' not in self.config:
-            self.config['invDirectories'] = []
-        if 'showItemIDs' not in self.config:
-            self.config['showItemIDs'] = False
-        if 'sortCharacters' not in self.config:
-            self.config['sortCharacters'] = False
-        if 'showServerNames' not in self.config:
-            self.config['showServerNames'] = False
+        self.config = load_config(self.config_file_path)
+        self.update_diagnostics_log()
 
     def get_inventory_files(self):
-        '''Finds inventory files in provided directories'''
-
-        # Abort if no directories have been provided
-        if not self.config['invDirectories']:
-            self.inventory_files = []
-        new_inventory_files = []  # For comparison
-
-        # Find inventory files each EQ directory
-        for inv_directory in self.config['invDirectories']:
-            for file in os.listdir(inv_directory):
-                fileMatch = re.match(inventory_file_re, file)
-                if fileMatch:
-                    new_inventory_files.append({
-                        'dir': inv_directory,
-                        'file': file,
-                        'character': fileMatch.group('character'),
-                        'server': fileMatch.group('server')
-                    })
-
-        # If the known inventory files list has changed, mark them as never loaded
-        if self.inventory_files != new_inventory_files:
-            self.inventory_files = new_inventory_files
-            self.inventories_last_loaded = 0
-        return
+        '''Scans the provided directories for a new snapshot of the inventory files'''
 
-    def load_inventories(self):
-        '''Load items from inventory files'''
+        timer = PhaseTimer('get_inventory_files')
+        scan_times = {}
+        self.inventory_files = scan_inventory_files(self.config['invDirectories'], scan_times)
+        timer.mark('scan directories')
 
-        previous_selected_char = self.current_selected_char  # For comparsion
-        self.ui.char_select_combo.clear()
+        timer.details.update({'files': len(self.inventory_files), 'directories': len(scan_times)})
+        timer.details.update({f'{inv_directory}': f'{scan_ms:.1f} ms' for inv_directory, scan_ms in scan_times.items()})
+        self.diagnostics.add(timer.record())
+        return
+
+    def load_inventories(self, rebuild=False):
+        '''Load items from the latest inventory file snapshot on a worker thread, only re-parsing files that have changed'''
 
-        self.inventories_last_loaded = time.time()
+        # Only one load runs at a time, reload again once the current one has finished
+        if self.inventory_loader is not None:
+            self.inventory_reload_pending = True
+            self.inventory_rebuild_pending = self.inventory_rebuild_pending or rebuild
+            return
+        rebuild = rebuild or self.inventory_rebuild_pending
+        self.inventory_reload_pending = False
+        self.inventory_rebuild_pending = False
+
+        # Later scans are compared against the snapshot being loaded to find modified files
+        self.loaded_inventory_file_stats = inventory_file_stats(self.inventory_files)
+
+        config = dict(self.config)
+        self.inventory_loader = InventoryLoader(self.inventory_cache, config, self.inventory, self.inventory_files, rebuild)
+        self.inventory_loader.signals.progress.connect(self.inventories_load_progress)
+        self.inventory_loader.signals.finished.connect(self.inventories_loaded)
+        self.inventory_loader.signals.failed.connect(self.inventories_load_failed)
+        self.ui.load_progress_bar.setRange(0, 0)
+        self.ui.load_progress_bar.show()
+        QThreadPool.globalInstance().start(self.inventory_loader)
+
+    def save_inventory_snapshot(self):
+        '''Saves the loaded inventory and search index with the cache on quitting, when a load has changed them since startup'''
+        if self.inventory_loader is not None or not self.inventories_ready or self.inventory_rebuild_pending:
+            return  # A load is running or failed part way, the next start applies the changes from the cache instead
+        if self.inventory_cache.snapshot_stale:
+            self.inventory_cache.write_snapshot(self.inventory, self.search_index)
+
+    def rebuild_inventory_cache(self):
+        '''Discards the inventory cache and re-parses every inventory file'''
+        self.get_inventory_files()
+        self.load_inventories(rebuild=True)
+
+    def inventories_load_progress(self, parsed_count, total_count):
+        '''Updates the progress bar as inventory files are parsed'''
+        self.ui.load_progress_bar.setRange(0, total_count)
+        self.ui.load_progress_bar.setValue(parsed_count)
+
+    def inventories_load_failed(self, error):
+        '''Shows why an inventory load failed, the next change to the inventory files loads them again'''
+
+        self.inventory_loader = None
+        self.ui.load_progress_bar.hide()
+        self.inventory_load_error = f'Unable to load inventory files: {error}'
+        timer = PhaseTimer('load_inventories')
+        timer.details['error'] = error
+        self.diagnostics.add(timer.record())
+        self.refresh_diagnostics()
+
+        # The cache may have been part way through applying files, so the next load starts over from the files
+        self.inventory_rebuild_pending = True
+        self.found_items_model.set_message(self.inventory_load_error)
+        self.update_character_hits({})
+        self.results_search = None
+
+        if self.inventory_reload_pending:
+            self.get_inventory_files()
+            self.load_inventories()
 
-        # Set empty variables to be filled
-        self.character_list = []  # List of all characters, for dropdown box
-        self.inventory = {}  # Dictionary of found items
-        account_most_recent_chars = {}  # To find the most recent file for shared characters
-        skip_sharedbank_characters = []  # List of characters with older shared bank data
+    def inventories_loaded(self, load_result):
+        '''Publishes the results of an inventory load to the UI'''
+
+        self.inventory_loader = None
+        self.inventory_load_error = None
+        self.ui.load_progress_bar.hide()
+        # Files that couldn't be read are left out of the loaded snapshot, so the next check loads them again
+        for inventory_file_path in load_result['unreadableFiles']:
+            self.loaded_inventory_file_stats.pop(inventory_file_path, None)
+
+        self.diagnostics.add(load_result['timings'])
+        self.diagnostics.add_file_parse_times(load_result['fileParseTimes'])
+        timer = PhaseTimer('inventories_loaded')
+
+        # Swap in the items that changed and update the search index with them
+        self.inventory, self.search_index = publish_load_result(self.inventory, self.search_index, self.config, load_result)
+        self.search_index.regex_worker = self.regex_worker
+        self.inventories_ready = True
+        timer.mark('swap items')
+
+        self.character_keys = load_result['characterList']
+        self.shared_bank_sources = load_result['sharedBankSources']
+        self.update_character_list()
+        timer.mark('character list')
+        # Results on show are patched with the changed items rather than searched again from scratch
+        self.find_inv_items(load_result['updatedItems'])
+        timer.mark('search')
+        timer.details['items'] = len(self.inventory)
+        self.diagnostics.add(timer.record())
+        if self.startup_timer is not None:
+            self.startup_finished()
+        self.refresh_diagnostics()
 
         # Prompt for inventory file if none are found
-        if len(self.inventory_files) == 0:
+        if len(load_result['inventoryFiles']) == 0:
             add_invdirs_prompt = QMessageBox(self)
             add_invdirs_prompt.setWindowTitle('EQ Inventory Searcher')
             add_invdirs_prompt.setText('Select an Inventory file from your EverQuest directory.')
@@ -118,248 +533,143 @@ class MainWindow(QMainWindow):
                 self.ui.tabs.setTabEnabled(0, False)
         else:  # Disable search tab
             self.ui.tabs.setTabEnabled(0, True)
-        
-        # Find the character with the most recent inventory file for each account
-        for inventory_file in self.inventory_files:
-            character_name = inventory_file['character']
-            if self.config['showServerNames']:
-                character_server = inventory_file['server']
-                if character_server:
-                    character_name += f' ({character_server})'
-            for account in self.config['accounts']:
-                if character_name in self.config['accounts'][account]:
-                    # Get the last modified time of the inventory file for comparison
-                    current_file_last_modified = os.path.getmtime(os.path.join(inventory_file['dir'], inventory_file['file']))
-                    if account in account_most_recent_chars:
-                        if account_most_recent_chars[account]['last_modified'] > current_file_last_modified:
-                            # This is not the most recent inventory file for the account, so don't use it for SharedBank data
-                            skip_sharedbank_characters.append(character_name)
-                            continue
-                    if account_most_recent_chars.get(account):
-                        # The current character is the most recent inventory file for the account, so don't use the previous one for SharedBank data
-                        skip_sharedbank_characters.append(account_most_recent_chars[account]['character'])
-                    # Add/Update the current character to the account
-                    account_most_recent_chars[account] = {'character': character_name, 'last_modified': current_file_last_modified}
-
-        # Loop through all inventory files and load items
-        for inventory_file in self.inventory_files:
-            character_name = inventory_file['character']
-            
-            if character_name in self.config['ignoredCharacters']:
-                continue
-            
-            if self.config['showServerNames']:
-                character_server = inventory_file['server']
-                if character_server:
-                    character_name += f' ({character_server})'
-
-            # SharedBank slots will be skipped if this character's inventory file is not the most recent for the account
-            skip_sharedbank = (character_name in skip_sharedbank_characters)
-
-            if character_name not in self.character_list:
-                self.character_list.append(character_name)
-
-            inventory_file_path = os.path.join(inventory_file['dir'], inventory_file['file'])
-
-            # Match characters against configured accounts
-            account_name = None
-            for account in account_most_recent_chars:
-                if character_name == account_most_recent_chars[account]['character']:
-                    account_name = account
-                    break
-
-            with open(inventory_file_path, 'r', encoding='utf-8') as file:
-                inventory_text = file.read()
-
-            character_known_item_ids = []
-            find_items_re = r'(?P<itemLocation>[\w-]+)\t(?P<itemName>.+)\t(?P<itemID>[\d]+)\t(?P<itemCount>[\d]+)\t(?P<itemSlots>[\d]+)'
-            for item in re.finditer(find_items_re, inventory_text):
-                item_location = item.group('itemLocation')
-                item_name = item.group('itemName')
-                item_id = item.group('itemID')
-                item_count = int(item.group('itemCount'))
-
-                if item_id == '0':  # Item is either coin or an empty slot
-                    if item_count == 0:
-                        continue
-                    elif item_location == 'General-Coin' or item_location == 'Bank-Coin':
-                        item_location = item_location.replace('-Coin', '')
-                        if item_location == 'Bank':
-                            item_location = 'SharedBank'
-                        item_id = 'in Plat'
-                        item_name = 'Coins'
-                        item_count = int(item_count / 1000)
-                    else:
-                        continue
-
-                # For SharedBank slots, skip if the character's inventory file is not the most recent for the account
-                if 'SharedBank' in item_location and skip_sharedbank is True:
-                    continue
-               
-                # When a character is configured to be in an account, use the account's name for SharedBank slots
-                if 'SharedBank' in item_location and account_name:
-                    item_character = f'{account_name} (Account)'
-                else:
-                    item_character = character_name
-
-                if item_id not in character_known_item_ids:
-                    character_known_item_ids.append(item_id)
-
-                if item_id not in self.inventory:
-                    self.inventory[item_id] = {'name': item_name, 'totalCount': 0, 'characters': {}}
-
-                self.inventory[item_id]['totalCount'] += item_count
-
-                if item_character not in self.inventory[item_id]['characters']:
-                    self.inventory[item_id]['characters'][item_character] = {'locations': {}, 'count': 0}
-
-                self.inventory[item_id]['characters'][item_character]['count'] += item_count
-
-                if item_location not in self.inventory[item_id]['characters'][item_character]['locations']:
-                    self.inventory[item_id]['characters'][item_character]['locations'][item_location] = 0
-                self.inventory[item_id]['characters'][item_character]['locations'][item_location] += item_count
-
-        # Sort the inventory by Item ID
-        self.inventory = dict(natsorted(self.inventory.items()))
-
-        # Sort the character list alphabetically
-        if self.config["sortCharacters"]:
-            # Sort the accounts in front of the characters
-            for item in self.inventory.values():
-                characters = item.get('characters', {})
-                account_characters = {k: v for k, v in characters.items() if "(Account)" in k}
-                other_characters = {k: v for k, v in characters.items() if "(Account)" not in k}
-                sorted_account_characters = dict(sorted(account_characters.items()))
-                # Reconstruct the 'characters' dictionary with (Account) characters first
-                item['characters'] = {**sorted_account_characters, **other_characters}
-
-            # Sort the character List
-            self.character_list.sort()
-        
-        # Add the All Characters option at the beginning
-        self.character_list.insert(0, 'All')
 
-        # Update the character combo box
-        self.ui.char_select_combo.addItems(self.character_list)
+        if self.inventory_reload_pending:
+            self.get_inventory_files()
+            self.load_inventories()
 
-        # Attempt to re-select the previous character, defaults to first option (All)
-        previous_char_index = self.ui.char_select_combo.findText(previous_selected_char)
-        if previous_char_index == -1:
-            previous_char_index = 0
-        self.ui.char_select_combo.setCurrentIndex(previous_char_index)
+    def retry_regex_search(self):
+        '''Searches again once the regex worker has started, checking without waiting on it'''
+        if self.regex_worker.starting():
+            QTimer.singleShot(REGEX_START_RETRY_MS, self.retry_regex_search)
+        else:
+            self.find_inv_items()
 
-    def find_inv_items(self):
-        '''Searches the stored inventory for search box contents'''
+    def find_inv_items(self, updated_items=None):
+        '''Searches the stored inventory for search box contents, after a load only the items in updated_items are re-shown'''
 
-        self.ui.found_items_tree.clear()  # Remove the current search results
+        self.search_debounce_timer.stop()  # A search waiting on the timer is now stale
 
         search_string = self.ui.search_box_edit.displayText()
 
         # No need to process if search box is empty
         if not search_string:
+            self.found_items_model.clear_results()  # Remove the current search results
+            self.update_character_hits({})
+            self.results_search = None
             return None
 
-        self.current_selected_char = self.ui.char_select_combo.currentText()
-
-        found_items = []  # To hold matching items
-        search_string = search_string.replace("'", "['`]")  # EQ sometimes uses `, othertimes '
-
-        characters_with_matches = ['All']
-
-        # Loop thorugh all items that were retrieved from inventory files
-        for item_id, item in self.inventory.items():
-            item_name = item['name']
-            try:
-                item_matched = re.search(fr"{search_string}", item_name, re.IGNORECASE)
-            except re.PatternError:  # Discard invalid regex patterns
-                item_matched = False
-
-            #  Can either match on item or item ID
-            if item_matched or search_string in str(item_id):
-                found_items_updated = False
-
-                if self.config['showItemIDs']:
-                    item_id_str = f' ({item_id})'
-                else:
-                    item_id_str = ''
-
-                # When searching all characters, create a parent row for the item with the grand total
-                if self.current_selected_char == 'All':
-                    total_count = str(item['totalCount'])
-                    found_item = QTreeWidgetItem([item_name + item_id_str, total_count])
-                    found_item.setForeground(0, QColor(255, 175, 255))
-                    found_item.setForeground(1, QColor(255, 175, 255))
-                    found_items_updated = True
-                for character, character_info in item['characters'].items():
-                    if character not in characters_with_matches:
-                        characters_with_matches.append(character)
-                    character_count = str(character_info['count'])
-                    # When searching all characters, create a character row
-                    if self.current_selected_char == 'All':
-                        found_char = QTreeWidgetItem([character, character_count])
-                        found_char.setTextAlignment(1, Qt.AlignmentFlag.AlignRight)
-                        found_char.setForeground(0, QColor(100, 200, 255))
-                        found_char.setForeground(1, QColor(100, 200, 255))
-                        found_item.addChild(found_char)
-                    # When searching a single character, create a parent row for the item with the character's total
-                    elif character == self.current_selected_char:
-                        found_item = QTreeWidgetItem([item_name + item_id_str, character_count])
-                        found_item.setForeground(0, QColor(255, 175, 255))
-                        found_item.setForeground(1, QColor(255, 175, 255))
-                        found_items_updated = True
-                    else:
-                        continue
-                    location_row_odd = True
-                    for location, location_count in character_info['locations'].items():
-                        find_location_re = r'^(?P<base_location>[a-zA-Z]+)(?P<base_slot>\d*)-*(?P<sub_location>[a-zA-Z]*)(?P<sub_slot>\d*)'
-                        friendly_location_groups = re.finditer(find_location_re, location)
-                        if not friendly_location_groups:
-                            break
-                        for friendly_location in friendly_location_groups:
-                            # Recreate the location line with padded values
-                            location_friendly_name = friendly_location.group('base_location').ljust(12)
-                            if friendly_location.group('base_slot'):
-                                location_friendly_name += friendly_location.group('base_slot').rjust(2)
-                            if friendly_location.group('sub_location'):
-                                location_friendly_name += ', '
-                            if friendly_location.group('sub_slot'):
-                                location_friendly_name += friendly_location.group('sub_slot').rjust(2)
-                        found_location = QTreeWidgetItem([location_friendly_name, str(location_count)])
-                        found_location.setFont(0, self.locationRowFont)
-                        found_location.setTextAlignment(1, Qt.AlignmentFlag.AlignRight)
-                        if location_row_odd is True:
-                            found_location.setBackground(0, QColor(50, 50, 50))
-                            found_location.setBackground(1, QColor(50, 50, 50))
-                            location_row_odd = False
-                        else:
-                            found_location.setBackground(0, QColor(70, 70, 70))
-                            found_location.setBackground(1, QColor(70, 70, 70))
-                            location_row_odd = True
-                        if self.current_selected_char == "All":
-                            # Searching all characters, use the character row as the parent
-                            found_char.addChild(found_location)
-                        else:
-                            # Searching a single character, use the item row as the parent
-                            found_item.addChild(found_location)
-
-                if found_items_updated is True:
-                    found_item.setTextAlignment(1, Qt.AlignmentFlag.AlignRight)
-                    found_items.append(found_item)
-
-        if len(found_items) == 0:
-            no_items_row = QTreeWidgetItem(['No matching items found.'])
-            found_items.append(no_items_row)
-        self.ui.found_items_tree.addTopLevelItems(found_items)
-        self.ui.found_items_tree.expandAll()
+        # Searches typed before the first load has finished wait for it
+        if not self.inventories_ready:
+            self.found_items_model.set_message(self.inventory_load_error or 'Loading inventories...')
+            return None
+
+        self.current_selected_char = self.ui.char_select_combo.currentData()
+
+        timer = PhaseTimer('find_inv_items')
+        try:
+            found_items, character_hits = find_items(self.inventory, self.search_index, search_string, self.current_selected_char, timer,
+                                                     self.config['fuzzySearch'], self.config['resultsOrder'], self.config['wildcardSearch'])
+        except SearchTooExpensive:
+            # The regex was stopped rather than left to freeze the window
+            self.found_items_model.set_message('Search too expensive, try a simpler regex')
+            self.update_character_hits({})
+            self.results_search = None
+            timer.details.update({'search': search_string, 'character': self.current_selected_char, 'tooExpensive': True})
+            self.diagnostics.add(timer.record())
+            return None
+        except SearchStarting:
+            # Rather than wait on the worker process, search again once it has had time to start
+            self.found_items_model.set_message('Regex search starting...')
+            self.update_character_hits({})
+            self.results_search = None
+            QTimer.singleShot(REGEX_START_RETRY_MS, self.retry_regex_search)
+            return None
 
+        total_count = total_found_count(self.search_index, found_items, self.current_selected_char)
+        timer.mark('total count')
+
+        # When a load changed the items of the search on show, its rows are patched so expanded rows, selection and scroll stay put
+        # Rows built with different display settings (saved along with a reloading setting) are rebuilt instead
+        results_search = (search_string, self.current_selected_char, *(self.config[setting] for setting in RESULTS_DISPLAY_SETTINGS))
+        patch_results = (updated_items is not None and found_items and self.found_items_model.found_items
+                         and self.results_search == results_search)
+        if patch_results:
+            self.found_items_model.update_results(found_items, total_count, updated_items)
+            timer.mark('patch results')
+        else:
+            # Only the first batch of items gets rows, and only smaller results are expanded
+            self.results_expanded = len(found_items) <= RESULTS_EXPAND_LIMIT
+            self.found_items_model.set_results(found_items, self.current_selected_char, self.config['showItemIDs'], total_count,
+                                               self.config['resultsLimit'], self.search_index.character_view)
+            timer.mark('build results')
+            if self.results_expanded:
+                self.ui.found_items_tree.expandAll()
+            timer.mark('expand results')
+        self.results_search = results_search
+
+        self.update_character_hits(character_hits)
+        timer.mark('character hits')
+
+        timer.details.update({'search': search_string, 'character': self.current_selected_char, 'matches': len(found_items),
+                              'resultRows': self.found_items_model.rowCount() - 1, 'expanded': self.results_expanded,
+                              'patched': bool(patch_results)})
+        self.diagnostics.add(timer.record())
+        return
+
+    def update_character_list(self):
+        '''Fills the character combo box with the loaded characters, named and ordered by the search index's character view'''
+
+        previous_selected_char = self.current_selected_char  # For comparsion
+
+        # Add the All Characters option at the beginning
+        self.character_list = ['All'] + self.search_index.character_view.character_list(self.character_keys)
+
+        # The text can also show search hits so the character is kept as item data
+        # Signals are blocked while it is filled, whoever fills it re-runs the search afterwards
+        self.ui.char_select_combo.blockSignals(True)
+        self.ui.char_select_combo.clear()
+        for character in self.character_list:
+            self.ui.char_select_combo.addItem(character, character)
+
+        # Attempt to re-select the previous character, defaults to first option (All)
+        previous_char_index = self.ui.char_select_combo.findData(previous_selected_char)
+        if previous_char_index == -1:
+            previous_char_index = 0
+        self.ui.char_select_combo.setCurrentIndex(previous_char_index)
+        self.ui.char_select_combo.blockSignals(False)
+
+    def update_character_hits(self, character_hits):
+        '''Shows how many matching items each character holds in the character combo box, colored by whether they hold any'''
+
+        self.character_hits = character_hits
         for index in range(self.ui.char_select_combo.count()):
-            character = self.ui.char_select_combo.itemText(index)
-            if character not in characters_with_matches:
-                background_color = QColor(240, 120, 120)
+            character = self.ui.char_select_combo.itemData(index)
+            hits = character_hits.get(character)
+            if not character_hits:  # No search, just the names
+                self.ui.char_select_combo.setItemText(index, character)
+                self.ui.char_select_combo.setItemData(index, None, Qt.ItemDataRole.ForegroundRole)
+                self.ui.char_select_combo.setItemData(index, None, Qt.ItemDataRole.ToolTipRole)
+            elif hits is None:
+                self.ui.char_select_combo.setItemText(index, character)
+                self.ui.char_select_combo.setItemData(index, QColor(240, 120, 120), Qt.ItemDataRole.ForegroundRole)
+                self.ui.char_select_combo.setItemData(index, 'No matching items', Qt.ItemDataRole.ToolTipRole)
             else:
-                background_color = QColor(120, 240, 120)
-            self.ui.char_select_combo.setItemData(index, background_color, Qt.ItemDataRole.ForegroundRole)
-        return
+                item_word = 'item' if hits[0] == 1 else 'items'
+                self.ui.char_select_combo.setItemText(index, f'{character} ({hits[0]:,})')
+                self.ui.char_select_combo.setItemData(index, QColor(120, 240, 120), Qt.ItemDataRole.ForegroundRole)
+                self.ui.char_select_combo.setItemData(index, f'{hits[0]:,} matching {item_word}, {hits[1]:,} in total', Qt.ItemDataRole.ToolTipRole)
+
+    def found_items_clicked(self, index):
+        '''Clicking the summary row shows the next batch of items'''
+        if index.isValid() and index.internalPointer().kind == 'summary':
+            self.found_items_model.fetchMore(QModelIndex())
+
+    def found_items_inserted(self, parent, first, last):
+        '''Expands items added by a later batch when the results are expanded'''
+        if self.results_expanded and not parent.isValid():
+            for row in range(first, last + 1):
+                self.ui.found_items_tree.expandRecursively(self.found_items_model.index(row, 0))
 
     def invdirs_add(self):
         '''Add an EQ directory via prompt'''
@@ -468,8 +778,10 @@ class MainWindow(QMainWindow):
         self.settings_changed = True
 
     def settings_save(self):
-        '''Save configured settings'''
+        '''Save configured settings, then redo only what the changed settings affect'''
         self.settings_changed = False
+        timer = PhaseTimer('settings_save')
+        previous_config = dict(self.config)  # Settings are replaced rather than modified, so a shallow copy is enough
         # Save Inventory Directory Tree
         new_invdirs_count = self.ui.settings_invdirs_tree.topLevelItemCount()
         self.config['invDirectories'] = []
@@ -483,6 +795,13 @@ class MainWindow(QMainWindow):
 
         self.config['showServerNames'] = self.ui.settings_showservernames_check.isChecked()
 
+        self.config['fuzzySearch'] = self.ui.settings_fuzzysearch_check.isChecked()
+        self.config['wildcardSearch'] = self.ui.settings_wildcardsearch_check.isChecked()
+        self.config['resultsLimit'] = self.ui.settings_resultslimit_spin.value()
+        self.config['resultsOrder'] = RESULT_ORDERS[self.ui.settings_resultsorder_combo.currentIndex()]
+        self.config['diagnosticsLog'] = self.ui.settings_diagnosticslog_check.isChecked()
+        self.update_diagnostics_log()
+
         # Save Shared Accounts Tree
         new_sharedaccounts_count = self.ui.settings_sharedaccounts_tree.topLevelItemCount()
         self.config['accounts'] = {}
@@ -511,15 +830,30 @@ class MainWindow(QMainWindow):
         self.config['windowPosition'] = {'x': self.x(), 'y': self.y()}
 
         # Save settings to file
-        if not os.path.isdir(self.config_dir):
-            os.makedirs(self.config_dir)
-        with open(self.config_file_path, 'w', encoding='utf-8') as yml_file:
-            yaml.dump(self.config, stream=yml_file, Dumper=IndentDumper)
+        save_config(self.config, self.config_file_path)
+        timer.mark('save config')
+
+        changed = changed_settings(previous_config, self.config)
+        if 'invDirectories' in changed:
+            # Only added directories are scanned, files from removed ones are dropped from the snapshot
+            self.inventory_files = rescan_inventory_directories(self.inventory_files, self.config['invDirectories'])
+            self.update_inventory_watcher()
+            timer.mark('scan directories')
+        if changed & RELOAD_SETTINGS:
+            # Parsed files are reused, only files of characters whose ignored or account settings changed are re-applied
+            self.load_inventories()
+        elif changed & CHARACTER_VIEW_SETTINGS:
+            # Characters are stored by (name, server), so showing servers or sorting them only changes how they are shown
+            self.search_index.set_characters(self.config, self.inventory_files)
+            self.update_character_list()
+            self.find_inv_items()
+        else:
+            # Everything else only changes how results are shown
+            self.find_inv_items()
+        timer.mark('apply settings')
 
-        # Re-load inventory and re-run search
-        self.get_inventory_files()
-        self.load_inventories()
-        self.find_inv_items()
+        timer.details['changed'] = ', '.join(sorted(changed - {'windowSize', 'windowPosition'})) or 'nothing'
+        self.diagnostics.add(timer.record())
 
     def update_settings_tab(self):
         '''Refreshes the settings tab'''
@@ -544,21 +878,40 @@ class MainWindow(QMainWindow):
         # Update the Show Server Names checkbox
         self.ui.settings_showservernames_check.setChecked(self.config['showServerNames'])
 
+        # Update the Fuzzy Search and Wildcard Search checkboxes and how many results are shown
+        self.ui.settings_fuzzysearch_check.setChecked(self.config['fuzzySearch'])
+        self.ui.settings_wildcardsearch_check.setChecked(self.config['wildcardSearch'])
+        self.ui.settings_resultslimit_spin.setValue(self.config['resultsLimit'])
+        self.ui.settings_resultsorder_combo.setCurrentIndex(RESULT_ORDERS.index(self.config['resultsOrder']))
+
+        # Update the Diagnostics page
+        self.ui.settings_diagnosticslog_check.setChecked(self.config['diagnosticsLog'])
+        self.refresh_diagnostics()
+
         self.settings_changed = False
 
         # Create a list of individual characters
         # Start with every character, they will be removed if associated with an account
-        individual_characters = self.character_list
-        if 'All' in individual_characters:
-            individual_characters.remove('All')
+        individual_characters = [character for character in self.character_list if character != 'All']
 
         # Update the Shared Accounts Tree
         if self.config['accounts']:
             for account in self.config['accounts']:
                 account_item = QTreeWidgetItem([account])
                 account_item.setFlags(account_item.flags() | Qt.ItemFlag.ItemIsEditable)
+                # The character whose SharedBank data is used for the account is shown in bold
+                shared_bank_source = self.shared_bank_sources.get(account)
+                if shared_bank_source:
+                    last_modified = time.strftime('%Y-%m-%d %H:%M', time.localtime(shared_bank_source['lastModified']))
+                    source_name = self.search_index.character_view.name(shared_bank_source['character'])
+                    account_item.setToolTip(0, f'SharedBank from {source_name}, updated {last_modified}')
                 for character in self.config['accounts'][account]:
                     character_item = QTreeWidgetItem([character])
+                    if shared_bank_source and character in configured_names(shared_bank_source['character']):
+                        source_font = character_item.font(0)
+                        source_font.setBold(True)
+                        character_item.setFont(0, source_font)
+                        character_item.setToolTip(0, f'Most recent inventory file for {account}, its SharedBank is used')
                     account_item.addChild(character_item)
                     if character in individual_characters:
                         individual_characters.remove(character)  # Remove this account from the individual characters list
@@ -606,6 +959,16 @@ class MainWindow(QMainWindow):
         selected_index = self.ui.char_select_combo.currentIndex()
         if direction == 'home':
             new_index = 0
+        elif direction == 'hits':
+            # Steps through the characters holding matches, most matching items first
+            ranked_indexes = sorted((index for index in range(1, total_items) if self.ui.char_select_combo.itemData(index) in self.character_hits),
+                                    key=lambda index: tuple(-hits for hits in self.character_hits[self.ui.char_select_combo.itemData(index)]))
+            if not ranked_indexes:
+                return
+            if selected_index in ranked_indexes:
+                new_index = ranked_indexes[(ranked_indexes.index(selected_index) + 1) % len(ranked_indexes)]
+            else:
+                new_index = ranked_indexes[0]
         elif direction == 'up':
             if selected_index == 0:
                 new_index = total_items - 1
@@ -619,27 +982,121 @@ class MainWindow(QMainWindow):
         self.ui.char_select_combo.setCurrentIndex(new_index)
         return
 
+    def update_inventory_watcher(self):
+        '''Watches the inventory directories and files for changes, falls back to polling if that fails'''
+
+        watched_paths = set(self.inventory_watcher.directories() + self.inventory_watcher.files())
+        wanted_paths = set(self.config['invDirectories'])
+        for inventory_file in self.inventory_files:
+            wanted_paths.add(inventory_file['path'])
+
+        stale_paths = watched_paths - wanted_paths
+        if stale_paths:
+            self.inventory_watcher.removePaths(list(stale_paths))
+        failed_paths = []
+        new_paths = wanted_paths - watched_paths
+        if new_paths:
+            failed_paths = self.inventory_watcher.addPaths(list(new_paths))
+
+        # Some file systems (such as network drives) don't provide change notifications
+        if failed_paths:
+            if not self.check_inventory_updates_timer.isActive():
+                self.check_inventory_updates_timer.setInterval(POLL_INTERVAL_MIN_MS)
+                self.check_inventory_updates_timer.start()
+        else:
+            self.check_inventory_updates_timer.stop()
+
+    def inventory_change_detected(self, path):
+        '''Restarts the debounce timer whenever a watched directory or file changes'''
+        self.inventory_change_debounce_timer.start()
+
+    def poll_inventory_modifications(self):
+        '''Polls for modified inventory files, backing off while nothing changes'''
+        if self.watch_inventory_modifications():
+            poll_interval = POLL_INTERVAL_MIN_MS
+        else:
+            poll_interval = min(self.check_inventory_updates_timer.interval() * 2, POLL_INTERVAL_MAX_MS)
+        self.check_inventory_updates_timer.setInterval(poll_interval)
+
     def watch_inventory_modifications(self):
         '''Checks to see if inventory files have been modified'''
+        timer = PhaseTimer('watch_inventory_modifications')
         self.get_inventory_files()
-        found_modified_inventory_files = False
-        for inventory_file in self.inventory_files:
-            file_path = os.path.join(inventory_file['dir'], inventory_file['file'])
-            last_modified = os.stat(file_path).st_mtime
-            if last_modified > self.inventories_last_loaded:
-                found_modified_inventory_files = True
-                break
+        timer.mark('get inventory files')
+        self.update_inventory_watcher()
+        timer.mark('update watcher')
+        # Files that were added, removed or modified since the last load change the snapshot's stats
+        found_modified_inventory_files = inventory_file_stats(self.inventory_files) != self.loaded_inventory_file_stats
+        timer.mark('compare files')
+        timer.details.update({'files': len(self.inventory_files), 'modified': found_modified_inventory_files})
+        self.diagnostics.add(timer.record())
         if found_modified_inventory_files is True:
             self.load_inventories()
+        return found_modified_inventory_files
+
+    def start_loading(self):
+        '''Reads settings and starts loading inventories, once the window has been painted'''
+
+        self.repaint()  # Paint now rather than after the settings and directories have been read
+        self.startup_timer.mark('first paint')
+
+        self.load_config()
+        self.startup_timer.mark('load config')
+        self.get_inventory_files()
+        self.update_inventory_watcher()
+        self.load_inventories()
+        self.startup_timer.mark('scan directories')
+
+    def startup_finished(self):
+        '''Records how long startup took once inventories can be searched, printing it when measuring startup'''
+
+        self.startup_timer.mark('first searchable')
+        self.startup_timer.details.update({'files': len(self.inventory_files), 'items': len(self.inventory)})
+        startup_record = self.startup_timer.record()
+        self.startup_timer = None
+        self.diagnostics.add(startup_record)
+        if self.measure_startup:
+            print(json.dumps(startup_record, indent=2))
+            QApplication.instance().quit()
+
+    def update_diagnostics_log(self):
+        '''Starts or stops writing diagnostics to a rotating log file in the config directory'''
+        if self.config['diagnosticsLog']:
+            if not os.path.isdir(self.config_dir):
+                os.makedirs(self.config_dir)
+            self.diagnostics.set_log_file(os.path.join(self.config_dir, DIAGNOSTICS_LOG_FILE))
+        else:
+            self.diagnostics.set_log_file(None)
+
+    def refresh_diagnostics(self):
+        '''Shows the latest timings on the Diagnostics page, when it is visible'''
+        if self.ui.settings_toolbox.currentWidget() is self.ui.settings_diagnostics_page:
+            self.ui.settings_diagnostics_text.setPlainText(self.diagnostics.report())
 
     def __init__(self):
 
         self.config = {}
         self.inventory_files = []
         self.inventory = {}
-        self.inventories_last_loaded = 0
+        self.inventory_cache = None
+        self.search_index = SearchIndex()
+        self.regex_worker = RegexWorker()  # Regex searches run in another process, so one that backtracks forever can be stopped
+        self.inventory_loader = None  # Currently running inventory load
+        self.inventory_load_error = None  # Why the last inventory load failed, shown until a load succeeds
+        self.inventory_reload_pending = False
+        self.inventory_rebuild_pending = False
+        self.character_list = []  # Names in the character combo box, starting with All
+        self.character_keys = []  # (name, server) keys of the loaded characters, in the order they were found
+        self.shared_bank_sources = {}  # Account to the character its SharedBank data is read from
+        self.loaded_inventory_file_stats = None  # Stats of the inventory files snapshot last loaded
         self.current_selected_char = None
+        self.character_hits = {}  # Matching items and their count held by each character, for the latest search
         self.settings_changed = False
+        self.diagnostics = Diagnostics()
+        self.startup_timer = PhaseTimer('startup', STARTUP_STARTED)
+        self.startup_timer.mark('start qt')
+        self.measure_startup = '--measure-startup' in sys.argv  # Print startup timings and quit once searchable
+        self.inventories_ready = False  # Searches wait until the first load has finished
 
         super().__init__()
         self.ui = Ui_MainWindow()
@@ -655,30 +1112,60 @@ class MainWindow(QMainWindow):
         window_icon.addFile(icon_path)
         self.setWindowIcon(window_icon)
 
+        # The location row uses whitespace to align values, so prepare a monospace font
+        self.locationRowFont = QFont('Consolas,Lucida Sans Typewriter', 14)
+        self.locationRowFont.setStyleHint(QFont.StyleHint.TypeWriter)
+
+        self.found_items_model = SearchResultsModel(self.locationRowFont, self)
+        self.ui.found_items_tree.setModel(self.found_items_model)
+        self.results_expanded = False
+        self.results_search = None  # Search text, character and display settings of the results on show, so a load can patch them
+        self.ui.found_items_tree.clicked.connect(self.found_items_clicked)
+        self.found_items_model.rowsInserted.connect(self.found_items_inserted)
         self.ui.found_items_tree.setColumnWidth(1, 85)
         # Only allow the first column to be stretched
         self.ui.found_items_tree.header().setStretchLastSection(False)
         self.ui.found_items_tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
         self.ui.about_version_label.setText(f'v{VERSION}')
 
+        diagnostics_font = QFont('Consolas,Lucida Sans Typewriter', 10)
+        diagnostics_font.setStyleHint(QFont.StyleHint.TypeWriter)
+        self.ui.settings_diagnostics_text.setFont(diagnostics_font)
+
+        # Searches run once typing pauses
+        self.search_debounce_timer = QTimer(self)
+        self.search_debounce_timer.setSingleShot(True)
+        self.search_debounce_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_debounce_timer.timeout.connect(self.find_inv_items)
+
+        # Inventory files are watched for changes, with polling only used as a fallback
+        self.inventory_watcher = QFileSystemWatcher(self)
+        self.inventory_change_debounce_timer = QTimer(self)
+        self.inventory_change_debounce_timer.setSingleShot(True)
+        self.inventory_change_debounce_timer.setInterval(WATCHER_DEBOUNCE_MS)
         self.check_inventory_updates_timer = QTimer(self)
-        self.check_inventory_updates_timer.setInterval(1000)
+        self.check_inventory_updates_timer.setInterval(POLL_INTERVAL_MIN_MS)
 
         # Set up QT Widget Connections
         self.ui.tabs.tabBarClicked.connect(self.tab_clicked)
         self.ui.tabs.currentChanged.connect(self.tab_changed)
 
-        self.ui.search_box_edit.textChanged.connect(self.find_inv_items)
+        self.ui.search_box_edit.textChanged.connect(lambda: self.search_debounce_timer.start())
         QShortcut('F2', self.ui.search_box_edit).activated.connect(lambda: self.char_select_combo_move('home'))
         QShortcut('Up', self.ui.search_box_edit).activated.connect(lambda: self.char_select_combo_move('up'))
         QShortcut('Down', self.ui.search_box_edit).activated.connect(lambda: self.char_select_combo_move('down'))
-        self.ui.char_select_combo.currentTextChanged.connect(self.find_inv_items)
+        QShortcut('F3', self.ui.search_box_edit).activated.connect(lambda: self.char_select_combo_move('hits'))
+        self.ui.char_select_combo.currentIndexChanged.connect(lambda: self.find_inv_items())
 
         self.ui.settings_invdirs_add_btn.pressed.connect(self.invdirs_add)
         self.ui.settings_invdirs_del_btn.pressed.connect(self.invdirs_del)
         self.ui.settings_showids_check.checkStateChanged.connect(self.mark_settings_changed)
         self.ui.settings_sortchars_check.checkStateChanged.connect(self.mark_settings_changed)
         self.ui.settings_showservernames_check.checkStateChanged.connect(self.mark_settings_changed)
+        self.ui.settings_fuzzysearch_check.checkStateChanged.connect(self.mark_settings_changed)
+        self.ui.settings_wildcardsearch_check.checkStateChanged.connect(self.mark_settings_changed)
+        self.ui.settings_resultslimit_spin.valueChanged.connect(self.mark_settings_changed)
+        self.ui.settings_resultsorder_combo.currentIndexChanged.connect(self.mark_settings_changed)
         self.ui.settings_sharedaccounts_tree.itemChanged.connect(self.mark_settings_changed)
         self.ui.settings_sharedaccounts_add_btn.pressed.connect(self.sharedaccount_add)
         self.ui.settings_sharedaccounts_del_btn.pressed.connect(self.sharedaccount_del)
@@ -687,25 +1174,27 @@ class MainWindow(QMainWindow):
         self.ui.settings_ignoredchars_add_btn.pressed.connect(self.ignoredchar_add)
         self.ui.settings_ignoredchars_remove_btn.pressed.connect(self.ignoredchar_del)
         self.ui.settings_save_btn.pressed.connect(self.settings_save)
-
-        self.check_inventory_updates_timer.timeout.connect(self.watch_inventory_modifications)
-        self.check_inventory_updates_timer.start()
-
-        # The location row uses whitespace to align values, so prepare a monospace font
-        self.locationRowFont = QFont('Consolas,Lucida Sans Typewriter', 14)
-        self.locationRowFont.setStyleHint(QFont.StyleHint.TypeWriter)
-
-        # Load inital config
-        self.config_dir = platformdirs.user_config_dir('eqInvSearch', appauthor=False)
+        self.ui.settings_rebuildcache_btn.pressed.connect(self.rebuild_inventory_cache)
+        self.ui.settings_diagnosticslog_check.checkStateChanged.connect(self.mark_settings_changed)
+        self.ui.settings_diagnostics_refresh_btn.pressed.connect(self.refresh_diagnostics)
+        self.ui.settings_toolbox.currentChanged.connect(self.refresh_diagnostics)
+
+        self.inventory_watcher.directoryChanged.connect(self.inventory_change_detected)
+        self.inventory_watcher.fileChanged.connect(self.inventory_change_detected)
+        self.inventory_change_debounce_timer.timeout.connect(self.watch_inventory_modifications)
+        self.check_inventory_updates_timer.timeout.connect(self.poll_inventory_modifications)
+
+        # Settings are read after the window is shown, start with the defaults
+        self.config_dir = get_config_dir()
         self.config_file_path = os.path.join(self.config_dir, SETTINGS_FILE)
-        self.load_config()
-
-        # Prepare for first search
-        self.get_inventory_files()
-        self.load_inventories()
+        self.config = load_config()
+        self.inventory_cache = InventoryCache(os.path.join(self.config_dir, CACHE_FILE))
 
+        # Show the window straight away, inventories are loaded in the background once it has been painted
         self.show()
         self.ui.search_box_edit.setFocus()
+        self.startup_timer.mark('create window')
+        QTimer.singleShot(0, self.start_loading)
 
 
 if __name__ == "__main__":
@@ -716,5 +1205,7 @@ if __name__ == "__main__":
     app.setFont(defaultFont)
 
     window = MainWindow()
+    app.aboutToQuit.connect(window.regex_worker.stop)
+    app.aboutToQuit.connect(window.save_inventory_snapshot)
 
     sys.exit(app.exec())
@@ -37,3 +37,79 @@ exe = EXE(
     entitlements_file=None,
     icon=['eqInvSearch.ico'],
 )
+
+# The command line interface gets its own console exe, the windowed one has nowhere to print to
+cli_a = Analysis(
+    ['cli.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['PySide6', 'qdarktheme'],
+    noarchive=False,
+    optimize=0,
+)
+cli_pyz = PYZ(cli_a.pure)
+
+cli_exe = EXE(
+    cli_pyz,
+    cli_a.scripts,
+    cli_a.binaries,
+    cli_a.datas,
+    [],
+    name='eqInvSearchCli',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=['eqInvSearch.ico'],
+)
+
+# Regex searches run in a small worker exe next to the GUI, so starting one doesn't unpack the whole GUI bundle
+regex_a = Analysis(
+    ['regex_worker.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['PySide6', 'qdarktheme'],
+    noarchive=False,
+    optimize=0,
+)
+regex_pyz = PYZ(regex_a.pure)
+
+regex_exe = EXE(
+    regex_pyz,
+    regex_a.scripts,
+    regex_a.binaries,
+    regex_a.datas,
+    [],
+    name='eqInvSearchRegex',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=['eqInvSearch.ico'],
+)
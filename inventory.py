@@ -0,0 +1,1334 @@
+'''Reads, aggregates and searches EQ inventory files, without depending on Qt'''
+
+import bisect
+import os
+import pickle
+import re
+import sqlite3
+import sys
+import time
+from array import array
+import platformdirs
+from query import QueryError, is_structured_query, parse_query
+from diagnostics import PhaseTimer
+from regex_worker import compile_regex, match_names
+
+SETTINGS_FILE = 'settings.yml'
+CACHE_FILE = 'inventoryCache.sqlite'
+CACHE_VERSION = 4  # Increase when the parsed item or snapshot format changes, older caches are discarded
+
+COIN_ITEM_ID = 0  # Coins use the empty slot ID, they are shown as "in Plat"
+
+PARSE_WORKERS = 8  # Inventory files parsed at once
+
+RESULTS_LIMIT = 200  # Matching items shown before more are asked for
+RESULT_ORDERS = ('id', 'name', 'count', 'holders')  # Orders results can be listed in, kept up to date by the search index
+
+FUZZY_MAX_EDITS = 3  # Most typos a fuzzy search allows, fewer for short searches
+FUZZY_CANDIDATE_LIMIT = 500  # Names sharing the most trigrams with a fuzzy search that are checked for edits
+
+inventory_file_re = r'^(?P<character>\w+)-Inventory(?:_(?P<server>\w+)(?:\.\w+)?)?.txt$'
+
+regex_metacharacters_re = r'[.^$*+?{}\[\]\\|()]'  # Search text containing these is treated as a regex
+
+glob_wildcards_re = r'[*?]'  # With wildcard search on, text whose only regex characters are these is matched as wildcards instead
+
+find_location_re = r'^(?P<base_location>[a-zA-Z]+)(?P<base_slot>\d*)-*(?P<sub_location>[a-zA-Z]*)(?P<sub_slot>\d*)'
+
+
+def get_config_dir():
+    '''Directory the settings and inventory cache are stored in'''
+    return platformdirs.user_config_dir('eqInvSearch', appauthor=False)
+
+
+def load_config(config_file_path=None):
+    '''Load config from file, filling in defaults for anything missing (everything, without a file)'''
+
+    config = None
+    if config_file_path and os.path.isfile(config_file_path):
+        import yaml  # Slow to import, so only imported once there are settings to read
+        with open(config_file_path, 'r', encoding='utf-8') as yml_file:
+            config = yaml.safe_load(yml_file)
+    if not config:
+        config = {}
+    if 'accounts' not in config:
+        config['accounts'] = {}
+    if 'ignoredCharacters' not in config:
+        config['ignoredCharacters'] = []
+    if 'invDirectories' not in config:
+        config['invDirectories'] = []
+    if 'showItemIDs' not in config:
+        config['showItemIDs'] = False
+    if 'sortCharacters' not in config:
+        config['sortCharacters'] = False
+    if 'showServerNames' not in config:
+        config['showServerNames'] = False
+    if 'diagnosticsLog' not in config:
+        config['diagnosticsLog'] = False
+    if 'fuzzySearch' not in config:
+        config['fuzzySearch'] = False
+    if 'wildcardSearch' not in config:
+        config['wildcardSearch'] = False
+    if 'resultsLimit' not in config:
+        config['resultsLimit'] = RESULTS_LIMIT
+    if config.get('resultsOrder') not in RESULT_ORDERS:
+        config['resultsOrder'] = 'id'
+    return config
+
+
+def save_config(config, config_file_path):
+    '''Save config to file, with lists indented under their keys'''
+    import yaml
+
+    class IndentDumper(yaml.Dumper):
+        '''Custom YAML Dumper that provides indentation'''
+        def increase_indent(self, flow=False, indentless=False):
+            return super().increase_indent(flow, False)
+
+    config_dir = os.path.dirname(config_file_path)
+    if not os.path.isdir(config_dir):
+        os.makedirs(config_dir)
+    with open(config_file_path, 'w', encoding='utf-8') as yml_file:
+        yaml.dump(config, stream=yml_file, Dumper=IndentDumper)
+
+
+def parse_inventory_file(inventory_file_path):
+    '''Reads an inventory file line by line and returns its items as (location, name, id, count) tuples'''
+
+    items = []
+    intern = sys.intern  # The same locations and names repeat across every file, so share a single copy of each
+    with open(inventory_file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            fields = line.split('\t')
+            if len(fields) == 5:
+                item_location, item_name, item_id, item_count, _ = fields
+            elif len(fields) > 5:  # Names may contain tabs, everything between the location and the ID is the name
+                item_location, item_id, item_count = fields[0], fields[-3], fields[-2]
+                item_name = '\t'.join(fields[1:-3])
+            else:
+                continue
+
+            # The header row and anything else without numeric values is skipped
+            try:
+                if item_id == '0':  # Item is either coin or an empty slot, coins are counted in plat
+                    if item_count == '0':
+                        continue
+                    elif item_location == 'General-Coin':
+                        items.append(('General', 'Coins', COIN_ITEM_ID, int(item_count) // 1000))
+                    elif item_location == 'Bank-Coin':
+                        items.append(('SharedBank', 'Coins', COIN_ITEM_ID, int(item_count) // 1000))
+                    continue
+                items.append((intern(item_location), intern(item_name), int(item_id), int(item_count)))
+            except ValueError:
+                continue
+    return items
+
+
+def parse_inventory_file_timed(inventory_file_path):
+    '''Parses an inventory file, also returning how long it took in milliseconds'''
+    parse_started = time.perf_counter()
+    items = parse_inventory_file(inventory_file_path)
+    return items, (time.perf_counter() - parse_started) * 1000
+
+
+def pack_parsed_items(items):
+    '''Encodes parsed items for the cache file, as the file's distinct strings and an array of string indexes, IDs and counts'''
+
+    strings = {}
+    values = array('i')  # 32 bit like the packed entries are on Windows, whatever the platform
+    for item_location, item_name, item_id, item_count in items:
+        values.extend((strings.setdefault(item_location, len(strings)), strings.setdefault(item_name, len(strings)), item_id, item_count))
+    return '\n'.join(strings), values.tobytes()  # Lines were split on newlines, so no string contains one
+
+
+def unpack_parsed_items(strings_text, values_bytes):
+    '''Decodes items written by pack_parsed_items'''
+
+    strings = [sys.intern(string) for string in strings_text.split('\n')]
+    values = array('i')
+    values.frombytes(values_bytes)
+    return list(zip(map(strings.__getitem__, values[0::4]), map(strings.__getitem__, values[1::4]), values[2::4], values[3::4]))
+
+
+def pack_inventory(inventory):
+    '''Encodes aggregated items for the cache file's snapshot, as arrays of their IDs, names and where their entries end'''
+
+    item_ids = array('l', inventory)
+    name_indexes = array('l')
+    entry_ends = array('l')
+    entries = array('l')
+    for item in inventory.values():
+        name_indexes.append(item.name_index)
+        entries.extend(item.entries)
+        entry_ends.append(len(entries))
+    return item_ids, name_indexes, entry_ends, entries
+
+
+def unpack_inventory(tables, packed_inventory):
+    '''Decodes items written by pack_inventory, over the tables saved with them'''
+
+    item_ids, name_indexes, entry_ends, entries = packed_inventory
+    inventory = {}
+    entry_start = 0
+    for item_id, name_index, entry_end in zip(item_ids, name_indexes, entry_ends):
+        inventory[item_id] = InventoryItem(tables, name_index, entries[entry_start:entry_end])
+        entry_start = entry_end
+    return inventory
+
+
+def item_id_label(item_id):
+    '''Text shown for an item ID'''
+    return 'in Plat' if item_id == COIN_ITEM_ID else str(item_id)
+
+
+def item_sort_key(item_id):
+    '''Sorts items by ID, with coins last'''
+    return (item_id == COIN_ITEM_ID, item_id)
+
+
+def scan_inventory_files(inv_directories, scan_times=None):
+    '''Scans directories for inventory files, returning a snapshot of each file's path, character, server, mtime and size'''
+
+    inventory_files = []
+    for inv_directory in inv_directories:
+        scan_started = time.perf_counter()
+        with os.scandir(inv_directory) as directory_entries:
+            for directory_entry in directory_entries:
+                file_match = re.match(inventory_file_re, directory_entry.name)
+                if not file_match:
+                    continue
+                # Each file is stat'ed once per scan, everything else uses the snapshot
+                try:
+                    file_stat = directory_entry.stat()
+                except FileNotFoundError:  # Removed since the directory was listed
+                    continue
+                inventory_files.append({
+                    'dir': inv_directory,
+                    'file': directory_entry.name,
+                    'path': directory_entry.path,
+                    'character': file_match.group('character'),
+                    'server': file_match.group('server'),
+                    'mtime': file_stat.st_mtime,
+                    'size': file_stat.st_size
+                })
+        if scan_times is not None:
+            scan_times[inv_directory] = (time.perf_counter() - scan_started) * 1000
+    return inventory_files
+
+
+def rescan_inventory_directories(inventory_files, inv_directories, scan_times=None):
+    '''Updates a snapshot for a new list of directories, only scanning the directories it doesn't already have files for'''
+
+    directory_files = {}
+    for inventory_file in inventory_files:
+        directory_files.setdefault(inventory_file['dir'], []).append(inventory_file)
+    added_directories = [inv_directory for inv_directory in inv_directories if inv_directory not in directory_files]
+    for inventory_file in scan_inventory_files(added_directories, scan_times):
+        directory_files.setdefault(inventory_file['dir'], []).append(inventory_file)
+
+    # Files are kept in directory order, the same as a full scan
+    return [inventory_file for inv_directory in inv_directories for inventory_file in directory_files.get(inv_directory, [])]
+
+
+def changed_settings(previous_config, config):
+    '''Returns the names of the settings that differ between two configs'''
+    return {setting for setting in config if previous_config.get(setting) != config[setting]}
+
+
+def inventory_file_stats(inventory_files):
+    '''Maps each file path in a snapshot to its (mtime, size), for change detection'''
+    return {inventory_file['path']: (inventory_file['mtime'], inventory_file['size']) for inventory_file in inventory_files}
+
+
+def character_key(inventory_file):
+    '''Canonical (name, server) key a character's items are stored under, however the character is shown'''
+    return (inventory_file['character'], inventory_file['server'])
+
+
+def account_key(account):
+    '''Key of the row holding an account's SharedBank items'''
+    return (f'{account} (Account)', None)
+
+
+def character_display_name(character, show_server_names):
+    '''Name a character is shown as, with the server when server names are shown'''
+    character_name, server = character
+    if show_server_names and server:
+        return f'{character_name} ({server})'
+    return character_name
+
+
+def configured_names(character):
+    '''Names a character can be configured as, in accounts or ignored characters, with or without the server'''
+    character_name, server = character
+    if server:
+        return (character_name, f'{character_name} ({server})')
+    return (character_name,)
+
+
+def resolve_shared_banks(config, inventory_files):
+    '''Finds the most recent inventory file for each account, returns the source per account and the characters to skip SharedBank slots for'''
+
+    # Index the configured accounts by character once, rather than searching every account for every file
+    character_accounts = {}
+    for account, account_characters in config['accounts'].items():
+        for account_character in account_characters:
+            character_accounts.setdefault(account_character, []).append(account)
+
+    shared_bank_sources = {}  # Account to the character key, file and modified time its SharedBank data is read from
+    skip_sharedbank_characters = set()  # Keys of characters with older shared bank data
+    for inventory_file in inventory_files:
+        character = character_key(inventory_file)
+        # A character's accounts, whether they were configured with or without the server
+        accounts = dict.fromkeys(account for configured_name in configured_names(character)
+                                 for account in character_accounts.get(configured_name, ()))
+        for account in accounts:
+            shared_bank_source = shared_bank_sources.get(account)
+            if shared_bank_source is not None:
+                if shared_bank_source['lastModified'] > inventory_file['mtime']:
+                    # This is not the most recent inventory file for the account, so don't use it for SharedBank data
+                    skip_sharedbank_characters.add(character)
+                    continue
+                # The current character is the most recent inventory file for the account, so don't use the previous one for SharedBank data
+                skip_sharedbank_characters.add(shared_bank_source['character'])
+            shared_bank_sources[account] = {'character': character, 'path': inventory_file['path'],
+                                            'lastModified': inventory_file['mtime']}
+    return shared_bank_sources, skip_sharedbank_characters
+
+
+class InternTable:
+    '''Assigns a stable index to each distinct string, only ever appended to so it can be read while loading'''
+
+    def __init__(self):
+        self.values = []
+        self.indexes = {}
+
+    def intern(self, value):
+        '''Returns the index of value, adding it if it is new'''
+        index = self.indexes.get(value)
+        if index is None:
+            index = self.indexes[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+class InventoryTables:
+    '''Interned item names, characters and locations shared by every item'''
+
+    def __init__(self):
+        self.names = InternTable()
+        self.characters = InternTable()
+        self.locations = InternTable()
+
+
+class InventoryItem:
+    '''An aggregated item, with its (character, location, count) entries packed in an array over the interned tables'''
+    __slots__ = ('tables', 'name_index', 'entries')
+
+    def __init__(self, tables, name_index, entries):
+        self.tables = tables
+        self.name_index = name_index
+        self.entries = array('l', entries)  # Character index, location index and count for each location, grouped by character
+
+    @property
+    def name(self):
+        return self.tables.names.values[self.name_index]
+
+    @property
+    def total_count(self):
+        return sum(self.entries[2::3])
+
+    def counts(self):
+        '''Returns a mutable copy of the entries, keyed by (character index, location index)'''
+        return {(self.entries[index], self.entries[index + 1]): self.entries[index + 2] for index in range(0, len(self.entries), 3)}
+
+
+def apply_inventory_entries(inventory, updated_items, file_entries, sign):
+    '''Adds (sign=1) or removes (sign=-1) a file's packed item entries, the counts of changed items are collected in updated_items'''
+
+    for index in range(0, len(file_entries), 5):
+        item_id, name_index, character_index, location_index, item_count = file_entries[index:index + 5]
+        # Changes are made to copies of the counts, the published items are left untouched
+        if item_id not in updated_items:
+            item = inventory.get(item_id)
+            if item is not None:
+                updated_items[item_id] = [item.name_index, item.counts()]
+            else:
+                updated_items[item_id] = [name_index, {}]
+        item_counts = updated_items[item_id][1]
+
+        count_key = (character_index, location_index)
+        if sign > 0:
+            item_counts[count_key] = item_counts.get(count_key, 0) + item_count
+        elif count_key in item_counts:
+            item_counts[count_key] -= item_count
+            # Drop anything that no longer holds items
+            if item_counts[count_key] <= 0:
+                del item_counts[count_key]
+
+
+def build_inventory_item(tables, name_index, item_counts, character_sort_key):
+    '''Packs collected counts into an item with its characters in order, or None when nothing is left'''
+
+    if not item_counts:
+        return None
+    character_names = tables.characters.values
+    entries = []
+    for (character_index, location_index), item_count in sorted(item_counts.items(), key=lambda count: character_sort_key(character_names[count[0][0]])):
+        entries.extend((character_index, location_index, item_count))
+    return InventoryItem(tables, name_index, entries)
+
+
+def normalize_item_name(item_name):
+    '''Casefolds an item name, EQ sometimes uses ` and othertimes ' so both are treated as '''
+    return item_name.casefold().replace('`', "'")
+
+
+def is_glob_search(search_string):
+    '''Checks whether a search only uses the * and ? wildcards, which are matched without a regex'''
+    return (re.search(glob_wildcards_re, search_string) is not None
+            and re.search(regex_metacharacters_re, re.sub(glob_wildcards_re, '', search_string)) is None)
+
+
+def glob_parts(search_string):
+    '''Splits a wildcard search into the text between its * wildcards, parts with ? are compiled to match any one letter there'''
+    return [re.compile(re.escape(part).replace(r'\?', '.')) if '?' in part else part
+            for part in normalize_item_name(search_string).split('*') if part]
+
+
+def glob_matches(parts, name):
+    '''Checks whether the parts of a wildcard search are found in order in a name, each part is only looked for once'''
+    position = 0
+    for part in parts:
+        if isinstance(part, str):
+            position = name.find(part, position)
+            if position < 0:
+                return False
+            position += len(part)
+        else:
+            part_match = part.search(name, position)
+            if part_match is None:
+                return False
+            position = part_match.end()
+    return True
+
+
+def substring_edit_distance(pattern, text, max_edits):
+    '''Fewest edits turning pattern into any part of text, or None when more than max_edits are needed'''
+
+    # Myers' bit-parallel edit distance, bit i of each vector tracks how the edits change at pattern position i
+    pattern_mask = (1 << len(pattern)) - 1
+    last_bit = 1 << (len(pattern) - 1)
+    char_masks = {}
+    for index, pattern_char in enumerate(pattern):
+        char_masks[pattern_char] = char_masks.get(pattern_char, 0) | (1 << index)
+
+    plus_vertical, minus_vertical = pattern_mask, 0
+    edits = best_edits = len(pattern)
+    for text_char in text:
+        char_mask = char_masks.get(text_char, 0)
+        diagonal = (((char_mask & plus_vertical) + plus_vertical) ^ plus_vertical) | char_mask
+        plus_horizontal = minus_vertical | (~(diagonal | plus_vertical) & pattern_mask)
+        minus_horizontal = plus_vertical & diagonal
+        if plus_horizontal & last_bit:
+            edits += 1
+        elif minus_horizontal & last_bit:
+            edits -= 1
+        # A match may start anywhere in the text, so nothing is shifted in at the bottom
+        plus_horizontal = (plus_horizontal << 1) & pattern_mask
+        minus_horizontal = (minus_horizontal << 1) & pattern_mask
+        vertical = char_mask | minus_vertical
+        plus_vertical = minus_horizontal | (~(vertical | plus_horizontal) & pattern_mask)
+        minus_vertical = plus_horizontal & vertical
+        if edits < best_edits:
+            best_edits = edits
+    return best_edits if best_edits <= max_edits else None
+
+
+def location_keys(location):
+    '''Keys a location can be searched by with loc:, such as bank3-slot2, bank3 and bank for Bank3-Slot2'''
+
+    location_match = re.match(find_location_re, location)
+    keys = {location.casefold()}
+    if location_match:
+        base_location = location_match.group('base_location').casefold()
+        keys.add(base_location)
+        keys.add(base_location + location_match.group('base_slot'))
+        if base_location not in ('general', 'bank', 'sharedbank'):
+            keys.add('worn')
+    return keys
+
+
+class CharacterView:
+    '''How character keys are shown, by name (with the server when server names are shown) in found or alphabetical order'''
+
+    def __init__(self, show_server_names=False, sort_characters=False):
+        self.show_server_names = show_server_names
+        self.sort_characters = sort_characters
+
+    def name(self, character):
+        '''Name a character key is shown as'''
+        return character_display_name(character, self.show_server_names)
+
+    def character_list(self, characters):
+        '''Names of the character keys for the character list, characters shown with the same name are listed once'''
+        character_names = list(dict.fromkeys(self.name(character) for character in characters))
+        if self.sort_characters:
+            character_names.sort()
+        return character_names
+
+    def sorted_characters(self, characters):
+        '''Puts an item's characters in alphabetical order (accounts first) when sorting characters'''
+        if not self.sort_characters:
+            return characters
+        return dict(sorted(characters.items(), key=lambda character: ('(Account)' not in character[0], character[0])))
+
+    def characters(self, item):
+        '''Returns the locations and count of each character holding an item, by the name they are shown as'''
+        character_keys = item.tables.characters.values
+        location_names = item.tables.locations.values
+        characters = {}
+        for index in range(0, len(item.entries), 3):
+            character_name = self.name(character_keys[item.entries[index]])
+            if character_name not in characters:
+                characters[character_name] = {'locations': {}, 'count': 0}
+            # Characters shown with the same name can hold items in the same location
+            character_locations = characters[character_name]['locations']
+            location = location_names[item.entries[index + 1]]
+            character_locations[location] = character_locations.get(location, 0) + item.entries[index + 2]
+            characters[character_name]['count'] += item.entries[index + 2]
+        return self.sorted_characters(characters)
+
+    def character_counts(self, item):
+        '''Returns the count of each character holding an item, by the name they are shown as'''
+        character_keys = item.tables.characters.values
+        character_counts = {}
+        for index in range(0, len(item.entries), 3):
+            character_name = self.name(character_keys[item.entries[index]])
+            character_counts[character_name] = character_counts.get(character_name, 0) + item.entries[index + 2]
+        return self.sorted_characters(character_counts)
+
+
+class SearchIndex:
+    '''Item name, ID, character and location lookups used to answer searches without scanning every item'''
+
+    def __init__(self):
+        self.names = {}  # Casefolded item names by item ID
+        self.names_version = 0  # Increased when names change, so the regex worker knows to get them again
+        self.trigrams = {}  # Item IDs whose names contain each three character sequence
+        self.id_labels = []  # Sorted item ID text, for prefix matches
+        self.text_item_ids = {}  # IDs that aren't shown as numbers (coins), matched anywhere in their text
+        self.total_counts = {}  # Total count by item ID, for count comparisons
+        self.item_characters = {}  # Count held by each character key, for each item
+        self.character_item_ids = {}  # Item IDs held by each character key
+        self.character_item_counts = {}  # Count of each item held by each character key
+        self.item_locations = {}  # Location keys of each item
+        self.location_item_ids = {}  # Item IDs in each location key
+        self.location_keys = {}  # Location keys of each location, worked out once
+        self.account_characters = {}  # Character keys in each casefolded account, including its shared bank
+        self.server_characters = {}  # Character keys on each casefolded server
+        self.item_orders = {order: [] for order in RESULT_ORDERS}  # Item IDs sorted in each result order
+        self.order_keys = {order: {} for order in RESULT_ORDERS}  # Sort key of each item ID in each result order
+        self.character_view = CharacterView()  # How character keys are shown, for searching and counting by character name
+        self.regex_worker = None  # Runs regex searches in another process with a time limit, when set
+        self.last_search = None  # Previous plain text search and its matches, for narrowing
+        self.last_character_hits = None  # Previous matches and their character hits, reused while switching characters
+
+    def __getstate__(self):
+        '''Leaves out the regex worker and previous searches when the index is saved in the cache file's snapshot'''
+        state = dict(vars(self))
+        state.update(regex_worker=None, last_search=None, last_character_hits=None)
+        return state
+
+    def set_characters(self, config, inventory_files):
+        '''Records the characters in each account and on each server, and how characters are shown'''
+
+        self.character_view = CharacterView(config['showServerNames'], config['sortCharacters'])
+        self.last_character_hits = None
+
+        configured_characters = {}  # Character keys for each casefolded name they can be configured as
+        self.server_characters = {}
+        for inventory_file in inventory_files:
+            character = character_key(inventory_file)
+            for configured_name in configured_names(character):
+                configured_characters.setdefault(configured_name.casefold(), set()).add(character)
+            if inventory_file['server']:
+                self.server_characters.setdefault(inventory_file['server'].casefold(), set()).add(character)
+
+        self.account_characters = {}
+        for account, account_characters in config['accounts'].items():
+            self.account_characters[account.casefold()] = {account_key(account)}
+            for account_character in account_characters:
+                self.account_characters[account.casefold()] |= configured_characters.get(account_character.casefold(), set())
+
+    def update(self, updated_items):
+        '''Adds, replaces or removes (when None) items in the index'''
+
+        self.last_search = None
+        self.last_character_hits = None
+        for item_id, item in updated_items.items():
+            self.update_holders(item_id, item)
+
+            new_name = normalize_item_name(item.name) if item is not None else None
+            old_name = self.names.get(item_id)
+            if new_name == old_name:
+                continue
+            self.names_version += 1
+
+            if old_name is not None:
+                del self.names[item_id]
+                for index in range(len(old_name) - 2):
+                    trigram_item_ids = self.trigrams.get(old_name[index:index + 3])
+                    if trigram_item_ids is not None:
+                        trigram_item_ids.discard(item_id)
+                if item_id in self.text_item_ids:
+                    del self.text_item_ids[item_id]
+                else:
+                    id_label = item_id_label(item_id)
+                    id_index = bisect.bisect_left(self.id_labels, id_label)
+                    if id_index < len(self.id_labels) and self.id_labels[id_index] == id_label:
+                        del self.id_labels[id_index]
+
+            if new_name is not None:
+                self.names[item_id] = new_name
+                for index in range(len(new_name) - 2):
+                    self.trigrams.setdefault(new_name[index:index + 3], set()).add(item_id)
+                if item_id == COIN_ITEM_ID:
+                    self.text_item_ids[item_id] = item_id_label(item_id)
+                else:
+                    bisect.insort(self.id_labels, item_id_label(item_id))
+        self.update_orders(updated_items)
+
+    def order_key(self, order, item_id):
+        '''Sort key of an item in a result order, ties are listed by item ID with coins last'''
+        if order == 'name':
+            return (self.names[item_id], item_sort_key(item_id))
+        if order == 'count':
+            return (-self.total_counts[item_id], item_sort_key(item_id))
+        if order == 'holders':
+            return (-len(self.item_characters[item_id]), item_sort_key(item_id))
+        return item_sort_key(item_id)
+
+    def update_orders(self, updated_items):
+        '''Moves updated items to their place in each result order, only sorting everything when most items changed'''
+
+        for order in RESULT_ORDERS:
+            item_order = self.item_orders[order]
+            order_keys = self.order_keys[order]
+            if len(updated_items) * 4 > len(item_order):
+                for item_id, item in updated_items.items():
+                    if item is None:
+                        order_keys.pop(item_id, None)
+                    else:
+                        order_keys[item_id] = self.order_key(order, item_id)
+                self.item_orders[order] = sorted(order_keys, key=order_keys.__getitem__)
+                continue
+
+            for item_id, item in updated_items.items():
+                old_key = order_keys.get(item_id)
+                new_key = self.order_key(order, item_id) if item is not None else None
+                if new_key == old_key:
+                    continue
+                if old_key is not None:
+                    del item_order[bisect.bisect_left(item_order, old_key, key=order_keys.__getitem__)]
+                if new_key is None:
+                    del order_keys[item_id]
+                else:
+                    order_keys[item_id] = new_key
+                    bisect.insort(item_order, item_id, key=order_keys.__getitem__)
+
+    def ordered_item_ids(self, item_ids, order='id'):
+        '''Lists item IDs in a result order, walking the kept order when many items match rather than sorting them'''
+        item_order = self.item_orders[order]
+        if len(item_ids) * 16 < len(item_order):
+            return sorted(item_ids, key=self.order_keys[order].__getitem__)
+        return [item_id for item_id in item_order if item_id in item_ids]
+
+    def update_holders(self, item_id, item):
+        '''Re-indexes the total count, characters and locations of an item'''
+
+        for character in self.item_characters.pop(item_id, ()):
+            self.character_item_ids[character].discard(item_id)
+            del self.character_item_counts[character][item_id]
+        for location_key in self.item_locations.pop(item_id, ()):
+            self.location_item_ids[location_key].discard(item_id)
+        self.total_counts.pop(item_id, None)
+        if item is None:
+            return
+
+        character_names = item.tables.characters.values
+        location_names = item.tables.locations.values
+        holder_counts = {}
+        item_locations = set()
+        for index in range(0, len(item.entries), 3):
+            character = character_names[item.entries[index]]
+            holder_counts[character] = holder_counts.get(character, 0) + item.entries[index + 2]
+            location = location_names[item.entries[index + 1]]
+            if location not in self.location_keys:
+                self.location_keys[location] = location_keys(location)
+            item_locations |= self.location_keys[location]
+        item_characters = {}
+        for character, count in holder_counts.items():
+            self.character_item_ids.setdefault(character, set()).add(item_id)
+            self.character_item_counts.setdefault(character, {})[item_id] = count
+            item_characters[character] = count
+        for location_key in item_locations:
+            self.location_item_ids.setdefault(location_key, set()).add(item_id)
+        self.item_characters[item_id] = item_characters
+        self.item_locations[item_id] = item_locations
+        self.total_counts[item_id] = item.total_count
+
+    def search(self, search_string, wildcards=False):
+        '''Returns the IDs of items matching a structured query, or whose name matches the search string or ID starts with it
+
+        With wildcards, text whose only regex characters are * and ? is matched as a wildcard search rather than a regex.
+        '''
+
+        if is_structured_query(search_string):
+            self.last_search = None
+            try:
+                query_tree = parse_query(search_string)
+            except QueryError:  # Incomplete queries (such as while typing) match nothing
+                return set()
+            return self.evaluate(query_tree, wildcards)
+
+        if wildcards and is_glob_search(search_string):
+            self.last_search = None
+            return self.search_glob(search_string) | self.search_item_ids(search_string)
+
+        if re.search(regex_metacharacters_re, search_string):
+            self.last_search = None
+            return self.search_regex(search_string) | self.search_item_ids(search_string)
+
+        # The same search again (such as when switching characters) reuses its matches
+        if self.last_search is not None and search_string == self.last_search[0]:
+            return self.last_search[1]
+
+        # When more has been typed onto the previous search, only its matches need checking
+        if self.last_search is not None and search_string.startswith(self.last_search[0]):
+            search_name = normalize_item_name(search_string)
+            matched_item_ids = {
+                item_id for item_id in self.last_search[1]
+                if search_name in self.names[item_id] or self.item_id_matches(item_id, search_string)
+            }
+        else:
+            matched_item_ids = self.search_names(search_string) | self.search_item_ids(search_string)
+
+        self.last_search = (search_string, matched_item_ids)
+        return matched_item_ids
+
+    def search_names(self, search_string):
+        '''Returns the IDs of items whose name contains the search string'''
+
+        search_name = normalize_item_name(search_string)
+        if len(search_name) >= 3:
+            # Only names containing every trigram of the search can match, starting from the rarest
+            trigram_item_ids = sorted((self.trigrams.get(search_name[index:index + 3], set()) for index in range(len(search_name) - 2)), key=len)
+            candidate_item_ids = trigram_item_ids[0].intersection(*trigram_item_ids[1:])
+            return {item_id for item_id in candidate_item_ids if search_name in self.names[item_id]}
+        return {item_id for item_id, item_name in self.names.items() if search_name in item_name}
+
+    def search_glob(self, search_string):
+        '''Returns the IDs of items whose name contains a wildcard search, * matching any text and ? any one letter'''
+
+        # Only names containing every trigram of the text between wildcards can match
+        literals = re.split(glob_wildcards_re, normalize_item_name(search_string))
+        trigrams = {literal[index:index + 3] for literal in literals for index in range(len(literal) - 2)}
+        if trigrams:
+            trigram_item_ids = sorted((self.trigrams.get(trigram, set()) for trigram in trigrams), key=len)
+            candidate_item_ids = trigram_item_ids[0].intersection(*trigram_item_ids[1:])
+        else:
+            candidate_item_ids = self.names
+        parts = glob_parts(search_string)
+        return {item_id for item_id in candidate_item_ids if glob_matches(parts, self.names[item_id])}
+
+    def search_regex(self, search_string, candidate_item_ids=None):
+        '''Returns the IDs of items (out of candidate_item_ids, or all of them) whose name matches a regex
+
+        With a regex worker set, the search runs there and raises SearchTooExpensive when it takes too long,
+        or SearchStarting when the worker process hasn't started yet.
+        '''
+
+        if candidate_item_ids is self.names:
+            candidate_item_ids = None
+        if self.regex_worker is not None:
+            matched_item_ids = self.regex_worker.search(self.names, self.names_version, search_string, candidate_item_ids)
+            if matched_item_ids is not None:
+                return matched_item_ids
+
+        # Regex searches are compiled once and checked against every name
+        search_re = compile_regex(search_string)
+        if not search_re:
+            return set()
+        return match_names(search_re, self.names, self.names if candidate_item_ids is None else candidate_item_ids)
+
+    def search_fuzzy(self, search_string):
+        '''Returns the IDs of items whose name is within a few typos of the search string, closest first'''
+
+        search_name = normalize_item_name(search_string)
+        max_edits = min(FUZZY_MAX_EDITS, len(search_name) // 5)
+
+        # Each typo changes at most three trigrams, so a close name must share most of the search's trigrams
+        search_trigrams = {search_name[index:index + 3] for index in range(len(search_name) - 2)}
+        trigram_counts = {}
+        for trigram in search_trigrams:
+            for item_id in self.trigrams.get(trigram, ()):
+                trigram_counts[item_id] = trigram_counts.get(item_id, 0) + 1
+        min_shared_trigrams = max(1, len(search_trigrams) - 3 * max_edits)
+        candidate_item_ids = sorted((item_id for item_id, shared_count in trigram_counts.items() if shared_count >= min_shared_trigrams),
+                                    key=lambda item_id: trigram_counts[item_id], reverse=True)[:FUZZY_CANDIDATE_LIMIT]
+
+        # Exact matches are always included, even when the search is too short to share a trigram
+        ranked_items = {item_id: 0 for item_id in self.search_names(search_string) | self.search_item_ids(search_string)}
+        for item_id in candidate_item_ids:
+            if item_id not in ranked_items:
+                edits = substring_edit_distance(search_name, self.names[item_id], max_edits)
+                if edits is not None:
+                    ranked_items[item_id] = edits
+
+        # Fewest edits first, then names starting with the search, then shorter names
+        return sorted(ranked_items, key=lambda item_id: (ranked_items[item_id], not self.names[item_id].startswith(search_name),
+                                                         len(self.names[item_id]), item_sort_key(item_id)))
+
+    def search_item_ids(self, search_string):
+        '''Returns the IDs of items whose ID starts with the search string'''
+
+        matched_item_ids = set()
+        id_index = bisect.bisect_left(self.id_labels, search_string)
+        while id_index < len(self.id_labels) and self.id_labels[id_index].startswith(search_string):
+            matched_item_ids.add(int(self.id_labels[id_index]))
+            id_index += 1
+        # Coins can match anywhere in their ID
+        for item_id, id_label in self.text_item_ids.items():
+            if search_string in id_label:
+                matched_item_ids.add(item_id)
+        return matched_item_ids
+
+    def item_id_matches(self, item_id, search_string):
+        '''Checks a single item ID against the search string'''
+        if item_id in self.text_item_ids:
+            return search_string in self.text_item_ids[item_id]
+        return item_id_label(item_id).startswith(search_string)
+
+    def characters_matching(self, characters):
+        '''Returns the IDs of items held by any of the character keys'''
+        matched_item_ids = set()
+        for character in characters:
+            matched_item_ids |= self.character_item_ids.get(character, set())
+        return matched_item_ids
+
+    def character_keys(self, character_name):
+        '''Returns the keys of the characters shown as a name, more than one when servers aren't shown'''
+        return [character for character in self.character_item_ids if self.character_view.name(character) == character_name]
+
+    def held_item_ids(self, character_name):
+        '''Returns the IDs of items held by the characters shown as a name'''
+        character_item_ids = [self.character_item_ids[character] for character in self.character_keys(character_name)]
+        if len(character_item_ids) == 1:
+            return character_item_ids[0]
+        return set().union(*character_item_ids)
+
+    def character_matches(self, matched_item_ids, character_name, order='id'):
+        '''Returns the matched item IDs held by a character in a result order, only looking at the smaller of the two'''
+        character_item_ids = self.held_item_ids(character_name)
+        if len(character_item_ids) < len(matched_item_ids):
+            return self.ordered_item_ids({item_id for item_id in character_item_ids if item_id in matched_item_ids}, order)
+        return self.ordered_item_ids({item_id for item_id in matched_item_ids if item_id in character_item_ids}, order)
+
+    def character_hits(self, matched_item_ids):
+        '''Returns how many of the matched items each character holds and their count, by the name they are shown as, in one pass'''
+
+        if self.last_character_hits is not None and self.last_character_hits[0] is matched_item_ids:
+            return self.last_character_hits[1]
+        character_names = {character: self.character_view.name(character) for character in self.character_item_ids}
+        hits = {}  # Matching items, count and the last item counted for each character name
+        for item_id in matched_item_ids:
+            for character, count in self.item_characters.get(item_id, {}).items():
+                character_name = character_names[character]
+                character_hits = hits.get(character_name)
+                if character_hits is None:
+                    hits[character_name] = [1, count, item_id]
+                else:
+                    # Characters shown with the same name only count an item once
+                    if character_hits[2] != item_id:
+                        character_hits[0] += 1
+                        character_hits[2] = item_id
+                    character_hits[1] += count
+        hits = {character_name: (character_hits[0], character_hits[1]) for character_name, character_hits in hits.items()}
+        self.last_character_hits = (matched_item_ids, hits)
+        return hits
+
+    def is_filter(self, node, wildcards=False):
+        '''Regex and count terms are checked item by item, so they are only applied to the candidates of other terms'''
+        if node[0] == 'count':
+            return True
+        return (node[0] == 'term' and node[1] in ('text', 'name') and re.search(regex_metacharacters_re, node[2]) is not None
+                and not (wildcards and is_glob_search(node[2])))
+
+    def filter(self, node, candidate_item_ids):
+        '''Returns the candidates matching a regex or count term'''
+
+        if node[0] == 'count':
+            _, operator, number = node
+            comparisons = {
+                '<': lambda count: count < number,
+                '<=': lambda count: count <= number,
+                '>': lambda count: count > number,
+                '>=': lambda count: count >= number,
+                '=': lambda count: count == number,
+                '!=': lambda count: count != number
+            }
+            compare = comparisons[operator]
+            return {item_id for item_id in candidate_item_ids if compare(self.total_counts.get(item_id, 0))}
+        matched_item_ids = self.search_regex(node[2], candidate_item_ids)
+        if node[1] == 'text':
+            matched_item_ids |= self.search_item_ids(node[2]) & set(candidate_item_ids)
+        return matched_item_ids
+
+    def lookup(self, node):
+        '''Returns the IDs of items matching a single term from the indexes, text terms are plain or wildcard searches'''
+
+        _, field, value = node
+        folded_value = value.casefold()
+        if field == 'text':
+            return (self.search_glob(value) if is_glob_search(value) else self.search_names(value)) | self.search_item_ids(value)
+        if field == 'name':
+            return self.search_glob(value) if is_glob_search(value) else self.search_names(value)
+        if field == 'id':
+            if value.endswith('*'):
+                return self.search_item_ids(value[:-1])
+            if value.isdigit():
+                return {int(value)} if int(value) in self.names else set()
+            return {item_id for item_id, id_label in self.text_item_ids.items() if folded_value in id_label.casefold()}
+        if field == 'char':
+            # A character can be named with or without their server
+            return self.characters_matching(character for character in self.character_item_ids
+                                            if folded_value in (configured_name.casefold() for configured_name in configured_names(character))
+                                            or character[0].casefold().startswith(f'{folded_value} ('))
+        if field == 'acct':
+            return self.characters_matching(self.account_characters.get(folded_value, ()))
+        if field == 'loc':
+            return set(self.location_item_ids.get(folded_value, ()))
+        if field == 'server':
+            return self.characters_matching(self.server_characters.get(folded_value, ()))
+        raise QueryError(f'Unknown field {field}')
+
+    def evaluate(self, node, wildcards=False):
+        '''Returns the IDs of items matching a parsed query, answering each term from the indexes'''
+
+        node_type = node[0]
+        if node_type == 'or':
+            matched_item_ids = set()
+            for child in node[1]:
+                matched_item_ids |= self.evaluate(child, wildcards)
+            return matched_item_ids
+        if node_type == 'not':
+            return set(self.names) - self.evaluate(node[1], wildcards)
+        if node_type != 'and':
+            return self.filter(node, self.names) if self.is_filter(node, wildcards) else self.lookup(node)
+
+        # Intersect the index lookups smallest first, then check regex and count terms and exclusions against what is left
+        positive_nodes = [child for child in node[1] if child[0] != 'not' and not self.is_filter(child, wildcards)]
+        filter_nodes = [child for child in node[1] if child[0] != 'not' and self.is_filter(child, wildcards)]
+        excluded_nodes = [child[1] for child in node[1] if child[0] == 'not']
+        if positive_nodes:
+            matched_sets = sorted((self.evaluate(child, wildcards) for child in positive_nodes), key=len)
+            matched_item_ids = matched_sets[0].intersection(*matched_sets[1:])
+        else:
+            matched_item_ids = set(self.names)
+        for child in filter_nodes:
+            if not matched_item_ids:
+                break
+            matched_item_ids = self.filter(child, matched_item_ids)
+        for child in excluded_nodes:
+            if not matched_item_ids:
+                break
+            if self.is_filter(child, wildcards):
+                matched_item_ids -= self.filter(child, matched_item_ids)
+            else:
+                matched_item_ids -= self.evaluate(child, wildcards)
+        return matched_item_ids
+
+
+class InventoryCache:
+    '''Parsed inventory files and the entries each file has contributed to the aggregated inventory'''
+
+    def __init__(self, cache_file_path=None):
+        self.cache_file_path = cache_file_path  # Parsed files are persisted here between runs
+        self.cache_file_read = False
+        self.files = {}  # Parsed items per file path, with the mtime and size they were read at
+        self.entries = {}  # Packed entries each file has contributed to the inventory
+        self.tables = InventoryTables()
+        self.snapshot = None  # Inventory and search index read from the cache file, the first load starts from them
+        self.snapshot_stale = False  # Set when a later load changed the entries since the snapshot was written
+
+    def open_cache_file(self):
+        '''Opens the cache file, discarding its contents if it was written by a different cache version'''
+
+        cache_dir = os.path.dirname(self.cache_file_path)
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        connection = sqlite3.connect(self.cache_file_path)
+        try:
+            connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        except sqlite3.DatabaseError:  # Not a usable database, start over
+            connection.close()  # Windows can't remove a file that is still open
+            os.remove(self.cache_file_path)
+            connection = sqlite3.connect(self.cache_file_path)
+            connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        cache_version = connection.execute("SELECT value FROM meta WHERE key = 'cacheVersion'").fetchone()
+        if cache_version is None or cache_version[0] != str(CACHE_VERSION):
+            connection.execute('DROP TABLE IF EXISTS files')  # Older versions stored the items in a different layout
+            connection.execute('DROP TABLE IF EXISTS snapshot')
+            connection.execute("INSERT OR REPLACE INTO meta VALUES ('cacheVersion', ?)", (str(CACHE_VERSION),))
+            connection.commit()
+        connection.execute('CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER, strings TEXT, items BLOB)')
+        connection.execute('CREATE TABLE IF NOT EXISTS snapshot (state BLOB)')
+        return connection
+
+    def read_cache_file(self):
+        '''Loads parsed files saved by a previous run, along with the snapshot of the inventory they were applied to'''
+
+        self.cache_file_read = True
+        if not self.cache_file_path:
+            return
+        connection = self.open_cache_file()
+        try:
+            for path, mtime, size, strings, items in connection.execute('SELECT path, mtime, size, strings, items FROM files'):
+                self.files[path] = {'stat': (mtime, size), 'items': unpack_parsed_items(strings, items)}
+            snapshot_row = connection.execute('SELECT state FROM snapshot').fetchone()
+        finally:
+            connection.close()
+        if snapshot_row is None:
+            return
+
+        # The cache file is the user's own, written by write_snapshot
+        try:
+            snapshot = pickle.loads(snapshot_row[0])
+        except Exception:  # Unreadable snapshots are ignored, the first load builds everything from the parsed files
+            return
+        self.tables = snapshot['tables']
+        self.entries = snapshot['entries']
+        self.snapshot = {'inventory': unpack_inventory(self.tables, snapshot['inventory']), 'searchIndex': snapshot['searchIndex']}
+
+    def write_snapshot(self, inventory, search_index):
+        '''Saves the inventory and search index with the entries they were built from, so the next start only applies later changes
+
+        They must be the ones published by the last load, with no load running.
+        '''
+
+        self.snapshot_stale = False
+        if not self.cache_file_path:
+            return
+        state = pickle.dumps({'tables': self.tables, 'entries': self.entries, 'inventory': pack_inventory(inventory),
+                              'searchIndex': search_index}, pickle.HIGHEST_PROTOCOL)
+        connection = self.open_cache_file()
+        try:
+            with connection:
+                connection.execute('DELETE FROM snapshot')
+                connection.execute('INSERT INTO snapshot VALUES (?)', (state,))
+        finally:
+            connection.close()
+
+    def write_cache_file(self, changed_file_paths, removed_file_paths):
+        '''Saves newly parsed files and forgets removed ones'''
+
+        if not self.cache_file_path or not (changed_file_paths or removed_file_paths):
+            return
+        connection = self.open_cache_file()
+        try:
+            with connection:
+                connection.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in removed_file_paths])
+                connection.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)', [
+                    (path, *self.files[path]['stat'], *pack_parsed_items(self.files[path]['items']))
+                    for path in changed_file_paths if path in self.files
+                ])
+        finally:
+            connection.close()
+
+    def clear(self):
+        '''Forgets all parsed files, on disk and in memory'''
+
+        self.files = {}
+        self.entries = {}
+        self.tables = InventoryTables()
+        self.snapshot = None
+        self.cache_file_read = True
+        if self.cache_file_path and os.path.isfile(self.cache_file_path):
+            os.remove(self.cache_file_path)
+
+    def load_changes(self, config, inventory, progress_callback=None, rebuild=False, inventory_files=None):
+        '''Parses changed inventory files from a scan snapshot (scanning if none is given), returns the items that changed without modifying inventory'''
+
+        timer = PhaseTimer('load_inventories')
+
+        # Rebuilding re-parses every file into an empty inventory
+        if rebuild:
+            self.clear()
+            inventory = {}
+        elif not self.cache_file_read:
+            self.read_cache_file()
+        timer.mark('read cache')
+
+        # The first load applies changes to the snapshot from the cache file, rather than to every file's entries from scratch
+        snapshot = self.snapshot
+        self.snapshot = None
+        if snapshot is not None and inventory:
+            snapshot = None  # Only the first load can start from it, later ones have their entries applied already
+        restored_items = 0
+        if snapshot is not None:
+            inventory = snapshot['inventory']
+            restored_items = len(inventory)
+
+        if inventory_files is None:
+            inventory_files = scan_inventory_files(config['invDirectories'])
+        timer.mark('scan directories')
+
+        # Set empty variables to be filled
+        character_list = []  # Keys of all characters, for dropdown box
+        character_rank = {}  # Order characters were found in, for consistent item character order
+        ignored_characters = set(config['ignoredCharacters'])
+
+        # The snapshot's stats are used for account resolution and change detection
+        file_stats = inventory_file_stats(inventory_files)
+
+        # Parse the files that are new or have a different modified time or size, in parallel
+        changed_file_paths = [path for path, stat in file_stats.items()
+                              if path not in self.files or self.files[path]['stat'] != stat]
+        file_parse_times = {}
+        unreadable_file_paths = []
+        if changed_file_paths:
+            from concurrent.futures import ThreadPoolExecutor, as_completed  # Deferred, as it is slow to import and often unused
+            with ThreadPoolExecutor(max_workers=min(len(changed_file_paths), PARSE_WORKERS)) as executor:
+                parse_futures = {executor.submit(parse_inventory_file_timed, path): path for path in changed_file_paths}
+                for parsed_count, parse_future in enumerate(as_completed(parse_futures), start=1):
+                    inventory_file_path = parse_futures[parse_future]
+                    try:
+                        parsed_items, parse_ms = parse_future.result()
+                    except (OSError, UnicodeDecodeError):  # File was removed, is being written or isn't text
+                        # Whatever was read from it before is kept, the caller tries it again on the next load
+                        unreadable_file_paths.append(inventory_file_path)
+                        continue
+                    self.files[inventory_file_path] = {'stat': file_stats[inventory_file_path], 'items': parsed_items}
+                    file_parse_times[inventory_file_path] = {'ms': parse_ms, 'size': file_stats[inventory_file_path][1],
+                                                             'items': len(parsed_items)}
+                    if progress_callback:
+                        progress_callback(parsed_count, len(changed_file_paths))
+        timer.mark('parse files')
+
+        # Files that couldn't be read are resolved by the modified time of the items kept from them
+        read_inventory_files = inventory_files
+        if unreadable_file_paths:
+            read_inventory_files = [dict(inventory_file, mtime=self.files[inventory_file['path']]['stat'][0])
+                                    if inventory_file['path'] in unreadable_file_paths and inventory_file['path'] in self.files
+                                    else inventory_file for inventory_file in inventory_files]
+        shared_bank_sources, skip_sharedbank_characters = resolve_shared_banks(config, read_inventory_files)
+        source_accounts = {}  # Character whose SharedBank data is used, to the account it is used for
+        for account, shared_bank_source in shared_bank_sources.items():
+            source_accounts.setdefault(shared_bank_source['character'], account)
+        timer.mark('shared banks')
+
+        # Remove items contributed by inventory files that no longer exist
+        updated_items = {}
+        entries_changed = False
+        for inventory_file_path in list(self.entries):
+            if inventory_file_path not in file_stats:
+                apply_inventory_entries(inventory, updated_items, self.entries.pop(inventory_file_path)['entries'], -1)
+                entries_changed = True
+        removed_file_paths = [path for path in self.files if path not in file_stats]
+        for inventory_file_path in removed_file_paths:
+            del self.files[inventory_file_path]
+        self.write_cache_file(list(file_parse_times), removed_file_paths)
+        timer.mark('write cache')
+
+        # Loop through all inventory files and update items from any that have changed
+        for inventory_file in inventory_files:
+            inventory_file_path = inventory_file['path']
+            if inventory_file_path not in file_stats or inventory_file_path not in self.files:
+                continue
+            # Characters are stored under their (name, server) key, how they are shown is worked out when showing them
+            character = character_key(inventory_file)
+            character_ignored = not ignored_characters.isdisjoint(configured_names(character))
+
+            # SharedBank slots will be skipped if this character's inventory file is not the most recent for the account
+            skip_sharedbank = (character in skip_sharedbank_characters)
+
+            # Match characters against configured accounts
+            account_name = source_accounts.get(character)
+
+            if not character_ignored:
+                if character not in character_rank:
+                    character_list.append(character)
+                character_rank.setdefault(character, len(character_rank))
+                if account_name:
+                    character_rank.setdefault(account_key(account_name), len(character_rank))
+
+            # Skip files whose parsed items and character details are unchanged since they were last applied
+            cached_file = self.files[inventory_file_path]
+            applied_key = (cached_file['stat'], character, account_name, skip_sharedbank, character_ignored)
+            applied_file = self.entries.get(inventory_file_path)
+            if applied_file is not None and applied_file['key'] == applied_key:
+                continue
+
+            file_entries = array('l')  # Item ID, name, character, location and count of each slot
+            if not character_ignored:
+                character_index = self.tables.characters.intern(character)
+                if account_name:
+                    account_index = self.tables.characters.intern(account_key(account_name))
+                for item_location, item_name, item_id, item_count in cached_file['items']:
+                    # For SharedBank slots, skip if the character's inventory file is not the most recent for the account
+                    if 'SharedBank' in item_location and skip_sharedbank is True:
+                        continue
+
+                    # When a character is configured to be in an account, use the account's name for SharedBank slots
+                    if 'SharedBank' in item_location and account_name:
+                        item_character_index = account_index
+                    else:
+                        item_character_index = character_index
+
+                    file_entries.extend((item_id, self.tables.names.intern(item_name), item_character_index,
+                                         self.tables.locations.intern(item_location), item_count))
+
+            # Replace the previous contribution of this file with the new one
+            if applied_file is not None:
+                apply_inventory_entries(inventory, updated_items, applied_file['entries'], -1)
+            apply_inventory_entries(inventory, updated_items, file_entries, 1)
+            self.entries[inventory_file_path] = {'key': applied_key, 'entries': file_entries}
+            entries_changed = True
+        timer.mark('apply items')
+
+        # Keep the characters of updated items in the order they were found, sorting them is left to the character view
+        character_sort_key = lambda character: character_rank.get(character, len(character_rank))
+        for item_id, (name_index, item_counts) in list(updated_items.items()):
+            item = build_inventory_item(self.tables, name_index, item_counts, character_sort_key)
+            published_item = inventory.get(item_id)
+            # Items a rewritten file left as they were aren't published again
+            if item is None and published_item is None:
+                del updated_items[item_id]
+            elif (item is not None and published_item is not None and item.name_index == published_item.name_index
+                  and item.entries == published_item.entries):
+                del updated_items[item_id]
+            else:
+                updated_items[item_id] = item
+        timer.mark('build items')
+
+        # When nothing has been published yet, the whole search index is built here rather than on the GUI thread
+        search_index = None
+        if snapshot is not None:
+            # Everything is published, the snapshot's items with the changes since applied to them and its index
+            search_index = snapshot['searchIndex']
+            search_index.update(updated_items)
+            updated_items = apply_load_result(inventory, {'rebuilt': False, 'updatedItems': updated_items})
+        elif not inventory:
+            search_index = SearchIndex()
+            search_index.update(updated_items)
+        timer.mark('search index')
+
+        # A first load that changed anything saves a new snapshot before publishing it, later loads are saved by the caller
+        if search_index is not None and entries_changed and self.cache_file_path:
+            self.write_snapshot(updated_items, search_index)
+        elif entries_changed:
+            self.snapshot_stale = True
+        timer.mark('write snapshot')
+
+        timer.details.update({'files': len(file_stats), 'parsedFiles': len(file_parse_times),
+                              'unreadableFiles': len(unreadable_file_paths), 'restoredItems': restored_items,
+                              'updatedItems': len(updated_items)})
+        return {
+            'rebuilt': rebuild,
+            'inventoryFiles': inventory_files,
+            'updatedItems': updated_items,
+            'characterList': character_list,
+            'searchIndex': search_index,
+            'sharedBankSources': shared_bank_sources,
+            'timings': timer.record(),
+            'fileParseTimes': file_parse_times,
+            'unreadableFiles': unreadable_file_paths
+        }
+
+
+def friendly_location_name(location):
+    '''Recreates an inventory location with padded values, so that locations line up in a monospace font'''
+
+    friendly_location = re.match(find_location_re, location)
+    if not friendly_location:
+        return location
+    location_friendly_name = friendly_location.group('base_location').ljust(12)
+    if friendly_location.group('base_slot'):
+        location_friendly_name += friendly_location.group('base_slot').rjust(2)
+    if friendly_location.group('sub_location'):
+        location_friendly_name += ', '
+    if friendly_location.group('sub_slot'):
+        location_friendly_name += friendly_location.group('sub_slot').rjust(2)
+    return location_friendly_name
+
+
+def apply_load_result(inventory, load_result):
+    '''Swaps the items changed by a load into the inventory and returns it, result orders are kept by the search index'''
+
+    if load_result['rebuilt']:
+        inventory = {}
+    for item_id, item in load_result['updatedItems'].items():
+        if item is None:
+            inventory.pop(item_id, None)
+        else:
+            inventory[item_id] = item
+    return inventory
+
+
+def publish_load_result(inventory, search_index, config, load_result):
+    '''Applies a load to the published inventory and search index, taking the load's index when it built one, returns both'''
+
+    inventory = apply_load_result(inventory, load_result)
+    if load_result['searchIndex'] is not None:
+        search_index = load_result['searchIndex']
+    else:
+        search_index.update(load_result['updatedItems'])
+    search_index.set_characters(config, load_result['inventoryFiles'])
+    return inventory, search_index
+
+
+def load_inventory(config, cache_file_path=None):
+    '''Loads every inventory file at once, returns the inventory and the load results'''
+
+    inventory_cache = InventoryCache(cache_file_path)
+    load_result = inventory_cache.load_changes(config, {})
+    inventory, _ = publish_load_result({}, None, config, load_result)
+    return inventory, load_result
+
+
+def find_items(inventory, search_index, search_string, selected_char='All', timer=None, fuzzy=False, order='id', wildcards=False):
+    '''Returns the matching (item_id, item) pairs for a character (or All) in a result order, and the (items, count) of the matches held by each character'''
+
+    # Look up matching item IDs in the search index
+    if fuzzy and not is_structured_query(search_string) and not re.search(regex_metacharacters_re, search_string):
+        # Fuzzy searches are listed closest match first, whatever the result order
+        ranked_item_ids = search_index.search_fuzzy(search_string)
+        matched_item_ids = set(ranked_item_ids)
+        if selected_char != 'All':
+            character_item_ids = search_index.held_item_ids(selected_char)
+            ranked_item_ids = [item_id for item_id in ranked_item_ids if item_id in character_item_ids]
+    else:
+        matched_item_ids = search_index.search(search_string, wildcards)
+        if selected_char == 'All':
+            ranked_item_ids = search_index.ordered_item_ids(matched_item_ids, order)
+        else:
+            # When searching a single character, only their items are looked at
+            ranked_item_ids = search_index.character_matches(matched_item_ids, selected_char, order)
+    if timer:
+        timer.mark('index search')
+
+    found_items = [(item_id, inventory[item_id]) for item_id in ranked_item_ids if item_id in inventory]
+    character_hits = {'All': (len(matched_item_ids), sum(search_index.total_counts.get(item_id, 0) for item_id in matched_item_ids))}
+    character_hits.update(search_index.character_hits(matched_item_ids))
+    if timer:
+        timer.mark('filter items')
+    return found_items, character_hits
+
+
+def total_found_count(search_index, found_items, selected_char='All'):
+    '''Adds up the count of every found item (or what the selected character holds of it) from the search index'''
+    if selected_char == 'All':
+        return sum(search_index.total_counts.get(item_id, 0) for item_id, _ in found_items)
+    character_item_counts = [search_index.character_item_counts[character] for character in search_index.character_keys(selected_char)]
+    return sum(item_counts.get(item_id, 0) for item_counts in character_item_counts for item_id, _ in found_items)
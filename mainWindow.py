@@ -17,9 +17,11 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QPalette, QPixmap, QRadialGradient, QTransform)
 from PySide6.QtWidgets import (QApplication, QCheckBox, QComboBox, QFrame,
     QGridLayout, QHeaderView, QLabel, QLineEdit,
-    QListWidget, QListWidgetItem, QMainWindow, QPushButton,
-    QSizePolicy, QSpacerItem, QTabWidget, QToolBox,
-    QTreeWidget, QTreeWidgetItem, QWidget)
+    QListWidget, QListWidgetItem, QMainWindow, QPlainTextEdit,
+    QProgressBar, QPushButton, QSizePolicy, QSpacerItem,
+    QSpinBox,
+    QTabWidget, QToolBox, QTreeView, QTreeWidget,
+    QTreeWidgetItem, QWidget)
 
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
@@ -60,18 +62,21 @@ class Ui_MainWindow(object):
 
         self.search_layout.addWidget(self.search_box_edit, 1, 0, 1, 1)
 
-        self.found_items_tree = QTreeWidget(self.search_tab)
-        self.found_items_tree.headerItem().setText(0, "")
-        __qtreewidgetitem = QTreeWidgetItem()
-        __qtreewidgetitem.setTextAlignment(1, Qt.AlignCenter);
-        self.found_items_tree.setHeaderItem(__qtreewidgetitem)
+        self.found_items_tree = QTreeView(self.search_tab)
         self.found_items_tree.setObjectName(u"found_items_tree")
         self.found_items_tree.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
-        self.found_items_tree.setColumnCount(2)
         self.found_items_tree.header().setStretchLastSection(True)
 
         self.search_layout.addWidget(self.found_items_tree, 2, 0, 1, 2)
 
+        self.load_progress_bar = QProgressBar(self.search_tab)
+        self.load_progress_bar.setObjectName(u"load_progress_bar")
+        self.load_progress_bar.setMaximumSize(QSize(16777215, 16))
+        self.load_progress_bar.setValue(0)
+        self.load_progress_bar.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        self.search_layout.addWidget(self.load_progress_bar, 3, 0, 1, 2)
+
         self.search_layout.setRowStretch(2, 1)
         self.search_layout.setColumnStretch(0, 1)
         self.tabs.addTab(self.search_tab, "")
@@ -106,7 +111,7 @@ class Ui_MainWindow(object):
         self.settings_general_layout.setContentsMargins(0, 0, 6, 0)
         self.verticalSpacer_2 = QSpacerItem(20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
 
-        self.settings_general_layout.addItem(self.verticalSpacer_2, 6, 1, 1, 1)
+        self.settings_general_layout.addItem(self.verticalSpacer_2, 9, 1, 1, 1)
 
         self.settings_sortchars_check = QCheckBox(self.settings_general_page)
         self.settings_sortchars_check.setObjectName(u"settings_sortchars_check")
@@ -183,13 +188,56 @@ class Ui_MainWindow(object):
 
         self.settings_general_layout.addWidget(self.settings_enableregex_check, 5, 1, 1, 1)
 
+        self.settings_fuzzysearch_check = QCheckBox(self.settings_general_page)
+        self.settings_fuzzysearch_check.setObjectName(u"settings_fuzzysearch_check")
+
+        self.settings_general_layout.addWidget(self.settings_fuzzysearch_check, 6, 1, 1, 1)
+
+        self.settings_wildcardsearch_check = QCheckBox(self.settings_general_page)
+        self.settings_wildcardsearch_check.setObjectName(u"settings_wildcardsearch_check")
+
+        self.settings_general_layout.addWidget(self.settings_wildcardsearch_check, 6, 2, 1, 1)
+
+        self.settings_resultslimit_label = QLabel(self.settings_general_page)
+        self.settings_resultslimit_label.setObjectName(u"settings_resultslimit_label")
+
+        self.settings_general_layout.addWidget(self.settings_resultslimit_label, 7, 1, 1, 1)
+
+        self.settings_resultslimit_spin = QSpinBox(self.settings_general_page)
+        self.settings_resultslimit_spin.setObjectName(u"settings_resultslimit_spin")
+        self.settings_resultslimit_spin.setMinimum(10)
+        self.settings_resultslimit_spin.setMaximum(10000)
+        self.settings_resultslimit_spin.setSingleStep(50)
+        self.settings_resultslimit_spin.setValue(200)
+
+        self.settings_general_layout.addWidget(self.settings_resultslimit_spin, 7, 2, 1, 1, Qt.AlignmentFlag.AlignLeft)
+
+        self.settings_resultsorder_label = QLabel(self.settings_general_page)
+        self.settings_resultsorder_label.setObjectName(u"settings_resultsorder_label")
+
+        self.settings_general_layout.addWidget(self.settings_resultsorder_label, 8, 1, 1, 1)
+
+        self.settings_resultsorder_combo = QComboBox(self.settings_general_page)
+        self.settings_resultsorder_combo.addItem("")
+        self.settings_resultsorder_combo.addItem("")
+        self.settings_resultsorder_combo.addItem("")
+        self.settings_resultsorder_combo.addItem("")
+        self.settings_resultsorder_combo.setObjectName(u"settings_resultsorder_combo")
+
+        self.settings_general_layout.addWidget(self.settings_resultsorder_combo, 8, 2, 1, 1, Qt.AlignmentFlag.AlignLeft)
+
         self.settings_general_right_margin = QFrame(self.settings_general_page)
         self.settings_general_right_margin.setObjectName(u"settings_general_right_margin")
         self.settings_general_right_margin.setStyleSheet(u"background-color: rgb(140, 185, 247);")
         self.settings_general_right_margin.setFrameShape(QFrame.Shape.VLine)
         self.settings_general_right_margin.setFrameShadow(QFrame.Shadow.Sunken)
 
-        self.settings_general_layout.addWidget(self.settings_general_right_margin, 0, 0, 7, 1)
+        self.settings_general_layout.addWidget(self.settings_general_right_margin, 0, 0, 11, 1)
+
+        self.settings_rebuildcache_btn = QPushButton(self.settings_general_page)
+        self.settings_rebuildcache_btn.setObjectName(u"settings_rebuildcache_btn")
+
+        self.settings_general_layout.addWidget(self.settings_rebuildcache_btn, 10, 1, 1, 2, Qt.AlignmentFlag.AlignLeft)
 
         self.settings_toolbox.addItem(self.settings_general_page, u"General")
         self.settings_accounts_page = QWidget()
@@ -329,6 +377,38 @@ class Ui_MainWindow(object):
         self.settings_accounts_layout.addWidget(self.settings_account_right_margin, 0, 0, 6, 1)
 
         self.settings_toolbox.addItem(self.settings_accounts_page, u"Accounts")
+        self.settings_diagnostics_page = QWidget()
+        self.settings_diagnostics_page.setObjectName(u"settings_diagnostics_page")
+        self.settings_diagnostics_page.setGeometry(QRect(0, 0, 453, 521))
+        self.settings_diagnostics_layout = QGridLayout(self.settings_diagnostics_page)
+        self.settings_diagnostics_layout.setObjectName(u"settings_diagnostics_layout")
+        self.settings_diagnostics_layout.setContentsMargins(0, 0, 6, 0)
+        self.settings_diagnostics_text = QPlainTextEdit(self.settings_diagnostics_page)
+        self.settings_diagnostics_text.setObjectName(u"settings_diagnostics_text")
+        self.settings_diagnostics_text.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.settings_diagnostics_text.setReadOnly(True)
+
+        self.settings_diagnostics_layout.addWidget(self.settings_diagnostics_text, 0, 1, 1, 2)
+
+        self.settings_diagnosticslog_check = QCheckBox(self.settings_diagnostics_page)
+        self.settings_diagnosticslog_check.setObjectName(u"settings_diagnosticslog_check")
+
+        self.settings_diagnostics_layout.addWidget(self.settings_diagnosticslog_check, 1, 1, 1, 1)
+
+        self.settings_diagnostics_refresh_btn = QPushButton(self.settings_diagnostics_page)
+        self.settings_diagnostics_refresh_btn.setObjectName(u"settings_diagnostics_refresh_btn")
+
+        self.settings_diagnostics_layout.addWidget(self.settings_diagnostics_refresh_btn, 1, 2, 1, 1, Qt.AlignmentFlag.AlignRight)
+
+        self.settings_diagnostics_right_margin = QFrame(self.settings_diagnostics_page)
+        self.settings_diagnostics_right_margin.setObjectName(u"settings_diagnostics_right_margin")
+        self.settings_diagnostics_right_margin.setStyleSheet(u"background-color: rgb(140, 185, 247);")
+        self.settings_diagnostics_right_margin.setFrameShape(QFrame.Shape.VLine)
+        self.settings_diagnostics_right_margin.setFrameShadow(QFrame.Shadow.Sunken)
+
+        self.settings_diagnostics_layout.addWidget(self.settings_diagnostics_right_margin, 0, 0, 2, 1)
+
+        self.settings_toolbox.addItem(self.settings_diagnostics_page, u"Diagnostics")
 
         self.settings_layout.addWidget(self.settings_toolbox, 0, 0, 1, 1)
 
@@ -371,8 +451,7 @@ class Ui_MainWindow(object):
         MainWindow.setWindowTitle(QCoreApplication.translate("MainWindow", u"EQ Inventory Searcher", None))
         self.char_select_label.setText(QCoreApplication.translate("MainWindow", u"Character:", None))
         self.search_box_layout.setText(QCoreApplication.translate("MainWindow", u"Search Items:", None))
-        ___qtreewidgetitem = self.found_items_tree.headerItem()
-        ___qtreewidgetitem.setText(1, QCoreApplication.translate("MainWindow", u"Quantity", None));
+        self.load_progress_bar.setFormat(QCoreApplication.translate("MainWindow", u"Loading inventories... %v/%m", None))
         self.tabs.setTabText(self.tabs.indexOf(self.search_tab), QCoreApplication.translate("MainWindow", u"Search", None))
         self.settings_save_btn.setText(QCoreApplication.translate("MainWindow", u"Save", None))
         self.settings_sortchars_check.setText(QCoreApplication.translate("MainWindow", u"Sort Characters", None))
@@ -382,6 +461,18 @@ class Ui_MainWindow(object):
         self.settings_invdirs_label.setText(QCoreApplication.translate("MainWindow", u"Directories containing inventory files:", None))
         self.settings_showids_check.setText(QCoreApplication.translate("MainWindow", u"Show Item IDs", None))
         self.settings_enableregex_check.setText(QCoreApplication.translate("MainWindow", u"Enable Regex", None))
+        self.settings_fuzzysearch_check.setText(QCoreApplication.translate("MainWindow", u"Fuzzy Search", None))
+        self.settings_wildcardsearch_check.setText(QCoreApplication.translate("MainWindow", u"Wildcard Search", None))
+        self.settings_resultslimit_label.setText(QCoreApplication.translate("MainWindow", u"Results Shown", None))
+#if QT_CONFIG(tooltip)
+        self.settings_resultslimit_spin.setToolTip(QCoreApplication.translate("MainWindow", u"Matching items shown at first, more are added when scrolling to the end", None))
+#endif // QT_CONFIG(tooltip)
+        self.settings_resultsorder_label.setText(QCoreApplication.translate("MainWindow", u"Sort Results By", None))
+        self.settings_resultsorder_combo.setItemText(0, QCoreApplication.translate("MainWindow", u"Item ID", None))
+        self.settings_resultsorder_combo.setItemText(1, QCoreApplication.translate("MainWindow", u"Name", None))
+        self.settings_resultsorder_combo.setItemText(2, QCoreApplication.translate("MainWindow", u"Total Count", None))
+        self.settings_resultsorder_combo.setItemText(3, QCoreApplication.translate("MainWindow", u"Characters Holding", None))
+        self.settings_rebuildcache_btn.setText(QCoreApplication.translate("MainWindow", u"Rebuild Inventory Cache", None))
         self.settings_toolbox.setItemText(self.settings_toolbox.indexOf(self.settings_general_page), QCoreApplication.translate("MainWindow", u"General", None))
         self.settings_sharedaccounts_add_btn.setText(QCoreApplication.translate("MainWindow", u"Add\n"
 "Account", None))
@@ -395,6 +486,9 @@ class Ui_MainWindow(object):
         self.settings_ignoredchars_remove_btn.setText("")
         self.settings_ignoredchars_add_btn.setText("")
         self.settings_toolbox.setItemText(self.settings_toolbox.indexOf(self.settings_accounts_page), QCoreApplication.translate("MainWindow", u"Accounts", None))
+        self.settings_diagnosticslog_check.setText(QCoreApplication.translate("MainWindow", u"Write Diagnostics Log", None))
+        self.settings_diagnostics_refresh_btn.setText(QCoreApplication.translate("MainWindow", u"Refresh", None))
+        self.settings_toolbox.setItemText(self.settings_toolbox.indexOf(self.settings_diagnostics_page), QCoreApplication.translate("MainWindow", u"Diagnostics", None))
         self.tabs.setTabText(self.tabs.indexOf(self.settings_tab), QCoreApplication.translate("MainWindow", u"Settings", None))
         self.about_info_label.setText(QCoreApplication.translate("MainWindow", u"<html><head/><body><p>Searches for items in Inventory.txt files generated from Everquest.</p><p>These files are usually located in your EverQuest directory, add them on the settings tab.</p><p>To create or update the inventory files, run the following command while in-game:<br/><span style=\" font-family:'Consolas'; color:#90ee90;\">/outputfile inventory</span></p><p>This application was designed for <a href=\"https://projectquarm.com/\"><span style=\" text-decoration: underline; color:#99ebff;\">Project Quarm</span></a> with the <a href=\"https://github.com/iamclint/Zeal\"><span style=\" text-decoration: underline; color:#99ebff;\">Zeal plug-in</span></a> installed, it may or may not work on other servers.</p><p><br/></p></body></html>", None))
         self.about_version_label.setText(QCoreApplication.translate("MainWindow", u"v0.1.0", None))
@@ -0,0 +1,137 @@
+'''Parses structured searches such as "rune char:Foo NOT loc:Bank count>5" into a tree of terms'''
+
+import re
+
+QUERY_OPERATORS = ('AND', 'OR', 'NOT')
+
+# Searches using a field, a count comparison or an operator are structured, anything else is plain text or a regex
+structured_query_re = r'(?:^|[\s(])(?:(?i:(?:name|id|char|acct|loc|server):|count(?:<=|>=|!=|=|<|>)\d)|(?:AND|OR|NOT)(?=$|[\s(]))'
+
+query_token_re = r'\s*(?:(?P<paren>[()])|"(?P<quoted>[^"]*)"?|(?P<word>[^\s()"]+))'
+
+field_term_re = r'^(?P<field>name|id|char|acct|loc|server):(?P<value>.*)$'
+
+count_term_re = r'^count(?P<operator><=|>=|!=|=|<|>)(?P<number>\d+)$'
+
+
+class QueryError(ValueError):
+    '''Raised for structured searches that can't be parsed'''
+
+
+def is_structured_query(search_string):
+    '''Checks whether a search uses the structured query syntax'''
+    return re.search(structured_query_re, search_string) is not None
+
+
+def tokenize_query(search_string):
+    '''Splits a search into (kind, value) tokens, where kind is paren, quoted or word'''
+
+    tokens = []
+    for token in re.finditer(query_token_re, search_string.strip()):
+        kind = token.lastgroup
+        if kind is None:
+            continue
+        tokens.append((kind, token.group(kind)))
+    return tokens
+
+
+class QueryParser:
+    '''Recursive descent parser, OR binds loosest, then AND (which can be left out between terms), then NOT
+
+    Nodes are ('or', [nodes]), ('and', [nodes]), ('not', node), ('term', field, value) and ('count', operator, number),
+    bare words next to each other are one text term so "Words of" still searches for the phrase.
+    '''
+
+    def __init__(self, search_string):
+        self.tokens = tokenize_query(search_string)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def is_operator(self, token, operator):
+        return token == ('word', operator)
+
+    def parse(self):
+        if not self.tokens:
+            raise QueryError('Empty search')
+        node = self.parse_or()
+        if self.position < len(self.tokens):
+            raise QueryError(f'Unexpected "{self.tokens[self.position][1]}"')
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.is_operator(self.peek(), 'OR'):
+            self.position += 1
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while True:
+            token = self.peek()
+            if self.is_operator(token, 'AND'):
+                self.position += 1
+            elif token[0] is None or token == ('paren', ')') or self.is_operator(token, 'OR'):
+                break
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not(self):
+        if self.is_operator(self.peek(), 'NOT'):
+            self.position += 1
+            return ('not', self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, value = self.peek()
+        if kind is None:
+            raise QueryError('Search ends too early')
+        self.position += 1
+
+        if kind == 'paren':
+            if value == ')':
+                raise QueryError('Unexpected ")"')
+            node = self.parse_or()
+            if self.peek() != ('paren', ')'):
+                raise QueryError('Missing ")"')
+            self.position += 1
+            return node
+
+        if kind == 'quoted':
+            return ('term', 'text', value)
+
+        if value in QUERY_OPERATORS:
+            raise QueryError(f'Missing a search term before {value}')
+
+        count_term = re.match(count_term_re, value, re.IGNORECASE)
+        if count_term:
+            return ('count', count_term.group('operator'), int(count_term.group('number')))
+
+        field_term = re.match(field_term_re, value, re.IGNORECASE)
+        if field_term:
+            field_value = field_term.group('value')
+            # Values with spaces can be quoted, as in acct:"Main Account"
+            if not field_value and self.peek()[0] == 'quoted':
+                field_value = self.peek()[1]
+                self.position += 1
+            if not field_value:
+                raise QueryError(f'Missing a value for {field_term.group("field")}:')
+            return ('term', field_term.group('field').lower(), field_value)
+
+        # Bare words up to the next operator, field or bracket are searched for as one phrase
+        words = [value]
+        while True:
+            next_kind, next_value = self.peek()
+            if (next_kind != 'word' or next_value in QUERY_OPERATORS or re.match(field_term_re, next_value, re.IGNORECASE)
+                    or re.match(count_term_re, next_value, re.IGNORECASE)):
+                break
+            words.append(next_value)
+            self.position += 1
+        return ('term', 'text', ' '.join(words))
+
+
+def parse_query(search_string):
+    '''Parses a structured search into a tree of nodes, raising QueryError when it is invalid'''
+    return QueryParser(search_string).parse()
@@ -0,0 +1,190 @@
+'''Runs regex searches in a worker process, so a pattern that backtracks for too long can be stopped instead of freezing the GUI'''
+
+import os
+import pickle
+import queue
+import re
+import signal
+import subprocess
+import sys
+import threading
+
+REGEX_TIME_LIMIT_MS = 500  # Longest a regex search may run before it is given up on
+REGEX_WORKER_EXE = 'eqInvSearchRegex.exe'  # Small worker exe shipped next to the frozen GUI, without Qt
+REGEX_WORKER_ARGUMENT = '--regex-worker'  # Runs a frozen GUI executable as the worker, when the worker exe is missing
+
+
+class SearchTooExpensive(Exception):
+    '''Raised when a regex search runs past its time limit'''
+
+
+class SearchStarting(Exception):
+    '''Raised when a regex search is made before the worker process has started'''
+
+
+def compile_regex(search_string):
+    '''Compiles a regex search matching either apostrophe, returning None when it is invalid'''
+    try:
+        return re.compile(search_string.replace("'", "['`]"), re.IGNORECASE)
+    except re.error:  # Discard invalid regex patterns
+        return None
+
+
+def match_names(search_re, names, item_ids):
+    '''Returns the IDs (out of item_ids) whose name matches a compiled regex'''
+    return {item_id for item_id in item_ids if item_id in names and search_re.search(names[item_id])}
+
+
+def serve_regex_searches(requests, replies):
+    '''Worker process loop, answers regex searches against the names it was last sent until its input is closed'''
+
+    names = {}
+    pickle.dump(('started', os.getpid()), replies)
+    replies.flush()
+    while True:
+        try:
+            request = pickle.load(requests)
+        except EOFError:
+            return
+        if request[0] == 'names':
+            names = request[1]
+            continue
+        _, search_string, candidate_item_ids = request
+        search_re = compile_regex(search_string)
+        pickle.dump(set() if search_re is None else match_names(search_re, names, names if candidate_item_ids is None else candidate_item_ids),
+                    replies, pickle.HIGHEST_PROTOCOL)
+        replies.flush()
+
+
+def main():
+    '''Runs the worker over stdin and stdout'''
+    serve_regex_searches(sys.stdin.buffer, sys.stdout.buffer)
+
+
+def worker_command():
+    '''Command starting a worker, which only imports this module rather than the GUI and Qt'''
+    if getattr(sys, 'frozen', False) or '__compiled__' in globals():  # PyInstaller or Nuitka executable
+        worker_exe_path = os.path.join(os.path.dirname(sys.executable), REGEX_WORKER_EXE)
+        if os.path.isfile(worker_exe_path):
+            return [worker_exe_path]
+        # The GUI exe runs the worker before importing Qt, but unpacks the whole bundle each time it starts
+        return [sys.executable, REGEX_WORKER_ARGUMENT]
+    return [sys.executable, os.path.abspath(__file__)]
+
+
+class RegexWorker:
+    '''Worker process for regex searches, replaced by a new one when a search takes too long
+
+    Python holds the GIL while a regex runs, so a thread can't be interrupted or keep the GUI responsive, a process can.
+    The process is only started by the first regex search, which doesn't wait for it.
+    '''
+
+    def __init__(self, time_limit_ms=REGEX_TIME_LIMIT_MS):
+        self.time_limit_ms = time_limit_ms
+        self.process = None
+        self.worker_pid = None  # Process the worker runs in, a child of process when started through a onefile exe
+        self.replies = None  # Replies read from the worker by a background thread, None once it has exited
+        self.started = None  # Set once the worker is ready for searches, or has exited
+        self.sent_names = None  # Names and their version last sent to the worker
+        self.unavailable = False  # Set when the worker couldn't be started, regexes are then searched in this process
+
+    def start(self):
+        '''Starts the worker process without waiting for it, unless one is already running'''
+
+        if self.unavailable or (self.process is not None and self.process.poll() is None):
+            return
+        self.stop()
+        try:
+            self.process = subprocess.Popen(worker_command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        except OSError:
+            self.unavailable = True
+            return
+        self.replies = queue.Queue()
+        self.started = threading.Event()
+        threading.Thread(target=self.read_replies, args=(self.process, self.replies, self.started), daemon=True).start()
+
+    def read_replies(self, process, replies, started):
+        '''Background thread queueing the worker's replies, the first one only says it has started and its process ID'''
+        try:
+            _, worker_pid = pickle.load(process.stdout)
+            if process is self.process:
+                self.worker_pid = worker_pid
+            started.set()
+            while True:
+                replies.put(pickle.load(process.stdout))
+        except (EOFError, OSError, ValueError, pickle.UnpicklingError):  # ValueError when stop closed the pipe while reading
+            replies.put(None)
+            started.set()
+
+    def starting(self):
+        '''Whether the worker process is running but not ready for searches yet'''
+        return self.process is not None and not self.started.is_set()
+
+    def wait_started(self, timeout_ms):
+        '''Starts the worker if needed and waits for it, returns False if it isn't ready in time'''
+        self.start()
+        return self.started is not None and self.started.wait(timeout_ms / 1000) and self.process.poll() is None
+
+    def stop(self):
+        '''Kills the worker process, along with any search it is running'''
+        if self.process is not None:
+            # A onefile exe unpacks itself and runs the worker in a child process, which is the one running the regex
+            if self.worker_pid not in (None, self.process.pid) and self.process.poll() is None:
+                try:
+                    os.kill(self.worker_pid, getattr(signal, 'SIGKILL', signal.SIGTERM))  # SIGTERM terminates it on Windows
+                except OSError:  # Already exited
+                    pass
+            self.process.kill()
+            self.process.wait()
+            for pipe in (self.process.stdin, self.process.stdout):
+                try:
+                    pipe.close()
+                except OSError:  # Unsent requests can't be flushed to a killed worker
+                    pass
+        self.process = None
+        self.worker_pid = None
+        self.sent_names = None
+
+    def send(self, request):
+        pickle.dump(request, self.process.stdin, pickle.HIGHEST_PROTOCOL)
+        self.process.stdin.flush()
+
+    def search(self, names, names_version, search_string, candidate_item_ids=None):
+        '''Returns the IDs of items (out of candidate_item_ids, or all of them) whose name matches a regex
+
+        Starts the worker if needed and raises SearchStarting until it is ready, SearchTooExpensive when the search runs past
+        the time limit, returns None if the worker can't be started.
+        '''
+
+        if self.process is not None and self.started.is_set() and self.process.poll() is not None:
+            # The worker exited by itself, rather than starting it again search in this process from now on
+            self.stop()
+            self.unavailable = True
+        self.start()
+        if self.unavailable:
+            return None
+        if self.starting():  # Checked without waiting, the caller searches again once it has started
+            raise SearchStarting('Regex worker is still starting')
+
+        try:
+            if self.sent_names is None or self.sent_names[0] is not names or self.sent_names[1] != names_version:
+                self.send(('names', names))
+                self.sent_names = (names, names_version)
+            self.send(('search', search_string, candidate_item_ids))
+            matched_item_ids = self.replies.get(timeout=self.time_limit_ms / 1000)
+        except queue.Empty:
+            # The next regex search starts another worker
+            self.stop()
+            raise SearchTooExpensive(f'Regex search took more than {self.time_limit_ms} ms')
+        except OSError:  # The worker has exited
+            matched_item_ids = None
+
+        if matched_item_ids is None:  # The worker died or couldn't run, search in this process from now on
+            self.stop()
+            self.unavailable = True
+        return matched_item_ids
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+'''Tests fuzzy search, the bit-parallel edit distance is checked against the textbook dynamic programming one'''
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+
+from generate_inventories import generate_inventories  # noqa: E402
+from inventory import find_items, load_inventory, substring_edit_distance  # noqa: E402
+
+
+def reference_edit_distance(pattern, text):
+    '''Fewest edits turning pattern into any part of text, a match may start and end anywhere in the text'''
+    previous_row = [0] * (len(text) + 1)
+    for pattern_index, pattern_char in enumerate(pattern, start=1):
+        row = [pattern_index]
+        for text_index, text_char in enumerate(text, start=1):
+            row.append(min(previous_row[text_index] + 1, row[-1] + 1, previous_row[text_index - 1] + (pattern_char != text_char)))
+        previous_row = row
+    return min(previous_row)
+
+
+class EditDistanceTest(unittest.TestCase):
+
+    def test_examples(self):
+        self.assertEqual(substring_edit_distance('mastery', 'words of mastery', 3), 0)
+        self.assertEqual(substring_edit_distance('mastry', 'words of mastery', 3), 1)
+        self.assertEqual(substring_edit_distance('wrds of mastry', 'words of mastery', 3), 2)
+        self.assertIsNone(substring_edit_distance('wrds of mastry', 'words of mastery', 1))
+        self.assertEqual(substring_edit_distance('abc', '', 3), 3)
+
+    def test_random_strings(self):
+        rng = random.Random(5)
+        for _ in range(5000):
+            alphabet = rng.choice(['ab', 'abc', 'abcdefghij'])
+            pattern = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 12)))
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            max_edits = rng.randint(0, 4)
+            expected = reference_edit_distance(pattern, text)
+            self.assertEqual(substring_edit_distance(pattern, text, max_edits), expected if expected <= max_edits else None,
+                             (pattern, text, max_edits))
+
+    def test_long_patterns(self):
+        # Patterns longer than a machine word still work, as Python integers have no fixed width
+        rng = random.Random(6)
+        for _ in range(200):
+            pattern = ''.join(rng.choice('abcd') for _ in range(rng.randint(60, 90)))
+            text = ''.join(rng.choice('abcd') for _ in range(rng.randint(50, 120)))
+            self.assertEqual(substring_edit_distance(pattern, text, 100), reference_edit_distance(pattern, text))
+
+
+class FuzzySearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        config = generate_inventories(cls.work_dir, characters=8, items_per_character=80, catalog_size=400, seed=4)
+        cls.inventory, load_result = load_inventory(config)
+        cls.search_index = load_result['searchIndex']
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+
+    def found_names(self, search_string):
+        found_items, _ = find_items(self.inventory, self.search_index, search_string, fuzzy=True)
+        return [item.name for _, item in found_items]
+
+    def test_typos(self):
+        self.assertEqual(self.found_names('Wrds of Mastry')[0], 'Words of Mastery')
+        self.assertEqual(self.found_names('Runne of Ice')[0], 'Rune of Ice')
+
+    def test_exact_matches_first(self):
+        found_names = self.found_names('Rune of Ice')
+        self.assertEqual(found_names[0], 'Rune of Ice')
+        exact_names = {item.name for _, item in find_items(self.inventory, self.search_index, 'Rune of Ice')[0]}
+        self.assertEqual(set(found_names[:len(exact_names)]), exact_names)
+
+    def test_short_searches_need_exact_matches(self):
+        # Searches under five letters allow no typos
+        exact_names = [item.name for _, item in find_items(self.inventory, self.search_index, 'Gat')[0]]
+        self.assertTrue(exact_names)
+        self.assertCountEqual(self.found_names('Gat'), exact_names)
+
+
+if __name__ == '__main__':
+    unittest.main()
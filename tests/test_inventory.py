@@ -0,0 +1,255 @@
+'''Tests loading inventory files, incremental loads are compared against loading every file again'''
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+
+from generate_inventories import generate_inventories  # noqa: E402
+from inventory import (  # noqa: E402
+    RESULT_ORDERS,
+    CharacterView,
+    InventoryCache,
+    InventoryItem,
+    InventoryTables,
+    SearchIndex,
+    item_sort_key,
+    normalize_item_name,
+    publish_load_result
+)
+
+
+def load(inventory_cache, config, inventory, search_index=None):
+    '''Loads changes like the GUI does, returns the new inventory, search index and load result'''
+    load_result = inventory_cache.load_changes(config, inventory)
+    inventory, search_index = publish_load_result(inventory, search_index, config, load_result)
+    return inventory, search_index, load_result
+
+
+def inventory_state(inventory, search_index):
+    '''Everything a load produces, in a form that can be compared between loads'''
+    character_view = CharacterView(show_server_names=True)
+    non_empty = lambda index: {key: value for key, value in index.items() if value}  # noqa: E731
+    return {
+        'items': {item_id: (item.name, character_view.characters(item)) for item_id, item in inventory.items()},
+        'names': search_index.names,
+        'totalCounts': search_index.total_counts,
+        'itemCharacters': search_index.item_characters,
+        'characterItemIds': non_empty(search_index.character_item_ids),
+        'locationItemIds': non_empty(search_index.location_item_ids)
+    }
+
+
+class IncrementalLoadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.config = generate_inventories(self.work_dir, characters=12, items_per_character=80, catalog_size=400,
+                                           directories=2, servers=('pq', 'tk'), account_size=3, seed=7)
+        self.rng = random.Random(7)
+        self.touches = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def inventory_file_paths(self):
+        return sorted(os.path.join(inv_directory, file_name) for inv_directory in self.config['invDirectories']
+                      for file_name in os.listdir(inv_directory))
+
+    def write_file(self, path, lines):
+        '''Writes an inventory file with a later modified time, so it is seen as changed'''
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        self.touches += 1
+        file_stat = os.stat(path)
+        os.utime(path, (file_stat.st_atime, file_stat.st_mtime + self.touches))
+
+    def edit_file(self, path):
+        '''Drops some rows and changes the count of others'''
+        with open(path, encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        edited_lines = lines[:1]
+        for line in lines[1:]:
+            fields = line.split('\t')
+            if self.rng.random() < 0.3:
+                continue
+            if fields[2] != '0' and self.rng.random() < 0.2:
+                fields[3] = str(self.rng.randint(1, 20))
+            edited_lines.append('\t'.join(fields))
+        self.write_file(path, edited_lines)
+
+    def assert_same_as_fresh_load(self, inventory, search_index):
+        fresh_inventory, fresh_search_index, _ = load(InventoryCache(), self.config, {})
+        self.assertEqual(inventory_state(inventory, search_index), inventory_state(fresh_inventory, fresh_search_index))
+
+    def test_changed_files(self):
+        inventory_cache = InventoryCache()
+        inventory, search_index, _ = load(inventory_cache, self.config, {})
+        for _ in range(5):
+            for path in self.rng.sample(self.inventory_file_paths(), 3):
+                self.edit_file(path)
+            inventory, search_index, load_result = load(inventory_cache, self.config, inventory, search_index)
+            self.assertIsNone(load_result['searchIndex'])
+            self.assert_same_as_fresh_load(inventory, search_index)
+
+    def test_added_and_removed_files(self):
+        inventory_cache = InventoryCache()
+        inventory, search_index, _ = load(inventory_cache, self.config, {})
+
+        removed_path = self.inventory_file_paths()[0]
+        with open(removed_path, encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        os.remove(removed_path)
+        self.write_file(os.path.join(self.config['invDirectories'][0], 'Newcomer-Inventory_pq.txt'), lines)
+        inventory, search_index, _ = load(inventory_cache, self.config, inventory, search_index)
+        self.assert_same_as_fresh_load(inventory, search_index)
+
+    def test_unchanged_reload_updates_nothing(self):
+        inventory_cache = InventoryCache()
+        inventory, search_index, _ = load(inventory_cache, self.config, {})
+        inventory, search_index, load_result = load(inventory_cache, self.config, inventory, search_index)
+        self.assertEqual(load_result['updatedItems'], {})
+
+    def test_rewritten_file_updates_nothing(self):
+        inventory_cache = InventoryCache()
+        inventory, search_index, _ = load(inventory_cache, self.config, {})
+        # Every file is moved on by the same time, so the most recent file of each account stays the same
+        for path in self.inventory_file_paths():
+            file_stat = os.stat(path)
+            os.utime(path, (file_stat.st_atime, file_stat.st_mtime + 100))
+        inventory, search_index, load_result = load(inventory_cache, self.config, inventory, search_index)
+        self.assertEqual(len(load_result['fileParseTimes']), len(self.inventory_file_paths()))
+        self.assertEqual(load_result['updatedItems'], {})
+
+    def test_settings_changes(self):
+        inventory_cache = InventoryCache()
+        inventory, search_index, _ = load(inventory_cache, self.config, {})
+
+        # Ignoring a character and moving one between accounts re-applies their files without parsing them
+        self.config['ignoredCharacters'] = ['Char004']
+        first_account = sorted(self.config['accounts'])[0]
+        self.config['accounts'][first_account].pop()
+        inventory, search_index, load_result = load(inventory_cache, self.config, inventory, search_index)
+        self.assertEqual(load_result['fileParseTimes'], {})
+        self.assert_same_as_fresh_load(inventory, search_index)
+
+        self.config['ignoredCharacters'] = []
+        inventory, search_index, _ = load(inventory_cache, self.config, inventory, search_index)
+        self.assert_same_as_fresh_load(inventory, search_index)
+
+    def test_unreadable_files(self):
+        # A file that can't be read keeps what was read from it before, and is reported so it is tried again
+        cache_file_path = os.path.join(self.work_dir, 'inventoryCache.sqlite')
+        inventory_cache = InventoryCache(cache_file_path)
+        inventory, search_index, _ = load(inventory_cache, self.config, {})
+        expected_state = inventory_state(inventory, search_index)
+
+        bad_path = self.inventory_file_paths()[0]
+        with open(bad_path, 'rb') as file:
+            contents = file.read()
+        with open(bad_path, 'ab') as file:
+            file.write(b'\xff')
+        inventory, search_index, load_result = load(inventory_cache, self.config, inventory, search_index)
+        self.assertEqual(load_result['unreadableFiles'], [bad_path])
+        self.assertEqual(load_result['updatedItems'], {})
+        self.assertEqual(inventory_state(inventory, search_index), expected_state)
+        inventory, _, _ = load(InventoryCache(cache_file_path), self.config, {})
+        self.assertEqual(inventory_state(inventory, search_index), expected_state)
+
+        self.write_file(bad_path, contents.decode('utf-8').splitlines())
+        inventory, search_index, load_result = load(inventory_cache, self.config, inventory, search_index)
+        self.assertEqual(load_result['unreadableFiles'], [])
+        self.assert_same_as_fresh_load(inventory, search_index)
+
+    def test_cache_file(self):
+        cache_file_path = os.path.join(self.work_dir, 'inventoryCache.sqlite')
+        inventory, search_index, _ = load(InventoryCache(cache_file_path), self.config, {})
+        self.edit_file(self.inventory_file_paths()[1])
+        inventory, search_index, load_result = load(InventoryCache(cache_file_path), self.config, {})
+        self.assertEqual(len(load_result['fileParseTimes']), 1)
+        self.assert_same_as_fresh_load(inventory, search_index)
+
+    def test_cache_file_snapshot(self):
+        # Starting again applies the changes since the snapshot to it, rather than building everything from the parsed files
+        cache_file_path = os.path.join(self.work_dir, 'inventoryCache.sqlite')
+        inventory_cache = InventoryCache(cache_file_path)
+        inventory, search_index, _ = load(inventory_cache, self.config, {})
+        self.edit_file(self.inventory_file_paths()[1])
+        inventory, search_index, load_result = load(InventoryCache(cache_file_path), self.config, {})
+        self.assertGreater(load_result['timings']['details']['restoredItems'], 0)
+        self.assert_same_as_fresh_load(inventory, search_index)
+
+        # Later loads mark the snapshot as stale, saving it means the next start has nothing to apply
+        inventory_cache = InventoryCache(cache_file_path)
+        inventory, search_index, _ = load(inventory_cache, self.config, {})
+        self.edit_file(self.inventory_file_paths()[2])
+        inventory, search_index, _ = load(inventory_cache, self.config, inventory, search_index)
+        self.assertTrue(inventory_cache.snapshot_stale)
+        inventory_cache.write_snapshot(inventory, search_index)
+        inventory_cache = InventoryCache(cache_file_path)
+        inventory, search_index, load_result = load(inventory_cache, self.config, {})
+        self.assertEqual(load_result['fileParseTimes'], {})
+        self.assertEqual(load_result['timings']['details']['restoredItems'], len(inventory))
+        self.assert_same_as_fresh_load(inventory, search_index)
+
+        # Loads after a restored one carry on from it
+        self.edit_file(self.inventory_file_paths()[3])
+        inventory, search_index, _ = load(inventory_cache, self.config, inventory, search_index)
+        self.assert_same_as_fresh_load(inventory, search_index)
+
+
+def expected_order_key(order, item_id, item):
+    '''Sort key of an item in a result order, worked out from the item rather than the search index'''
+    if order == 'name':
+        return (normalize_item_name(item.name), item_sort_key(item_id))
+    if order == 'count':
+        return (-item.total_count, item_sort_key(item_id))
+    if order == 'holders':
+        return (-len(set(item.entries[0::3])), item_sort_key(item_id))
+    return item_sort_key(item_id)
+
+
+class ResultOrderTest(unittest.TestCase):
+
+    def random_item(self, rng, tables):
+        '''An item with a few names shared between items, so orders have ties to break'''
+        name_index = tables.names.intern(rng.choice(['Rune of Ice', 'Words of Mastery', 'Cloth Cap', 'Bone Chips']))
+        entries = []
+        for character in rng.sample([('Char001', 'pq'), ('Char002', 'pq'), ('Char003', 'tk'), ('Char004', 'tk')], rng.randint(1, 3)):
+            entries.extend((tables.characters.intern(character), tables.locations.intern(f'General{rng.randint(1, 8)}'),
+                            rng.randint(1, 5)))
+        return InventoryItem(tables, name_index, entries)
+
+    def test_random_updates(self):
+        # Small batches move items within the kept orders, large ones sort everything again, item ID 0 is the coins
+        rng = random.Random(23)
+        tables = InventoryTables()
+        search_index = SearchIndex()
+        inventory = {}
+        for batch_size in [200, 1, 3, 10, 1, 150, 5, 20, 2, 8, 400, 4] * 3:
+            updated_items = {}
+            for item_id in rng.sample(range(200), min(batch_size, 200)):
+                if item_id in inventory and rng.random() < 0.3:
+                    del inventory[item_id]
+                    updated_items[item_id] = None
+                else:
+                    updated_items[item_id] = inventory[item_id] = self.random_item(rng, tables)
+            search_index.update(updated_items)
+
+            for order in RESULT_ORDERS:
+                expected_order = sorted(inventory, key=lambda item_id: expected_order_key(order, item_id, inventory[item_id]))
+                self.assertEqual(search_index.item_orders[order], expected_order)
+                for sample_size in (3, len(inventory) // 2):
+                    sample_item_ids = set(rng.sample(sorted(inventory), sample_size))
+                    self.assertEqual(search_index.ordered_item_ids(sample_item_ids, order),
+                                     [item_id for item_id in expected_order if item_id in sample_item_ids])
+
+
+if __name__ == '__main__':
+    unittest.main()
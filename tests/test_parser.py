@@ -0,0 +1,98 @@
+'''Tests parsing inventory files, generated files are checked against the regex parser earlier versions used'''
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+
+from generate_inventories import generate_inventories  # noqa: E402
+from inventory import COIN_ITEM_ID, parse_inventory_file  # noqa: E402
+
+find_items_re = r'(?P<itemLocation>[\w-]+)\t(?P<itemName>.+)\t(?P<itemID>[\d]+)\t(?P<itemCount>[\d]+)\t(?P<itemSlots>[\d]+)'
+
+
+def regex_parse_inventory_file(inventory_file_path):
+    '''Parses an inventory file the way earlier versions did, with a regex over the whole file'''
+
+    with open(inventory_file_path, 'r', encoding='utf-8') as file:
+        inventory_text = file.read()
+    items = []
+    for item in re.finditer(find_items_re, inventory_text):
+        item_location = item.group('itemLocation')
+        item_name = item.group('itemName')
+        item_id = int(item.group('itemID'))
+        item_count = int(item.group('itemCount'))
+        if item_id == 0:  # Item is either coin or an empty slot
+            if item_count == 0 or item_location not in ('General-Coin', 'Bank-Coin'):
+                continue
+            item_location = 'SharedBank' if item_location == 'Bank-Coin' else 'General'
+            item_id = COIN_ITEM_ID
+            item_name = 'Coins'
+            item_count = int(item_count / 1000)
+        items.append((item_location, item_name, item_id, item_count))
+    return items
+
+
+class ParseInventoryFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def write_file(self, text, newline='\n'):
+        path = os.path.join(self.work_dir, 'Char001-Inventory.txt')
+        with open(path, 'w', encoding='utf-8', newline=newline) as file:
+            file.write(text)
+        return path
+
+    def test_rows(self):
+        path = self.write_file('\n'.join([
+            'Location\tName\tID\tCount\tSlots',
+            'Charm\tSteatite Fragment\t13073\t1\t0',
+            'General1\tBackpack\t17005\t1\t8',
+            'General1-Slot1\tEmpty\t0\t0\t0',
+            'General1-Slot2\tRune of Ice\t10524\t20\t0',
+            'General-Coin\tCurrency\t0\t1234567\t0',
+            'Bank-Coin\tCurrency\t0\t999\t0',
+            'SharedBank1\tNote\twith a tab\t18700\t1\t0',
+            'Bank1\tBroken\trow',
+            ''
+        ]))
+        self.assertEqual(parse_inventory_file(path), [
+            ('Charm', 'Steatite Fragment', 13073, 1),
+            ('General1', 'Backpack', 17005, 1),
+            ('General1-Slot2', 'Rune of Ice', 10524, 20),
+            ('General', 'Coins', COIN_ITEM_ID, 1234),
+            ('SharedBank', 'Coins', COIN_ITEM_ID, 0),
+            ('SharedBank1', 'Note\twith a tab', 18700, 1)
+        ])
+        self.assertEqual(parse_inventory_file(path), regex_parse_inventory_file(path))
+
+    def test_crlf_line_endings(self):
+        text = 'Location\tName\tID\tCount\tSlots\nGeneral1\tBackpack\t17005\t1\t8\nGeneral-Coin\tCurrency\t0\t5000\t0\n'
+        self.assertEqual(parse_inventory_file(self.write_file(text, '\r\n')), parse_inventory_file(self.write_file(text)))
+        self.assertEqual(parse_inventory_file(self.write_file(text, '\r\n')),
+                         [('General1', 'Backpack', 17005, 1), ('General', 'Coins', COIN_ITEM_ID, 5)])
+
+    def test_generated_files_match_regex_parser(self):
+        config = generate_inventories(self.work_dir, characters=6, items_per_character=120, catalog_size=300, seed=12)
+        for inv_directory in config['invDirectories']:
+            for file_name in os.listdir(inv_directory):
+                path = os.path.join(inv_directory, file_name)
+                self.assertEqual(parse_inventory_file(path), regex_parse_inventory_file(path))
+                with open(path, encoding='utf-8') as file:
+                    text = file.read()
+                crlf_path = self.write_file(text, '\r\n')
+                self.assertEqual(parse_inventory_file(crlf_path), regex_parse_inventory_file(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,279 @@
+'''Tests the structured search syntax, random queries are checked against a brute force evaluator over every item'''
+
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+
+from generate_inventories import generate_inventories  # noqa: E402
+from inventory import (  # noqa: E402
+    COIN_ITEM_ID,
+    account_key,
+    configured_names,
+    glob_matches,
+    glob_parts,
+    item_id_label,
+    load_inventory,
+    location_keys,
+    normalize_item_name
+)
+from query import QueryError, is_structured_query, parse_query  # noqa: E402
+
+TEXT_VALUES = ['words of', 'rune', 'ice', "lord's", 'Lord`s', 'ring', 'e', '17', 'plat', 'Spell: Gate', 'zzz',
+               'rune*ice', 'r?ng', '*mastery', '^s.*e$', 'ice$', '(ring|boots)', 'of (ice|flame)']
+CHARACTER_VALUES = ['Char001', 'char002', 'Char003 (tk)', 'Char004 (pq)', 'Account000', 'Nobody']
+ACCOUNT_VALUES = ['Account000', 'account001', 'Nobody']
+LOCATION_VALUES = ['SharedBank', 'bank3', 'General1-Slot2', 'worn', 'primary', 'general', 'nowhere']
+SERVER_VALUES = ['pq', 'TK', 'xx']
+COUNT_OPERATORS = ['<', '<=', '>', '>=', '=', '!=']
+
+
+def render_value(value):
+    '''Quotes values that wouldn't be read back as a single word'''
+    return value if re.fullmatch(r'[^\s()"]+', value) else f'"{value}"'
+
+
+def render_query(node):
+    '''Writes a query tree as search text, bracketing every group so it parses back to the same tree'''
+
+    def render_child(child):
+        return f'({render_query(child)})' if child[0] in ('and', 'or') else render_query(child)
+
+    if node[0] == 'or':
+        return ' OR '.join(render_child(child) for child in node[1])
+    if node[0] == 'and':
+        return ' AND '.join(render_child(child) for child in node[1])
+    if node[0] == 'not':
+        return f'NOT {render_child(node[1])}'
+    if node[0] == 'count':
+        return f'count{node[1]}{node[2]}'
+    if node[1] == 'text':
+        return f'"{node[2]}"' if ' ' in node[2] or not re.fullmatch(r'[^\s()"]+', node[2]) else node[2]
+    return f'{node[1]}:{render_value(node[2])}'
+
+
+class BruteForceSearch:
+    '''Answers queries by checking every item against every term, without any of the search indexes'''
+
+    def __init__(self, inventory, config, wildcards=False):
+        self.config = config
+        self.wildcards = wildcards  # Whether text with only * and ? is matched as wildcards rather than a regex
+        self.items = {}
+        for item_id, item in inventory.items():
+            character_keys = item.tables.characters.values
+            location_names = item.tables.locations.values
+            self.items[item_id] = {
+                'name': normalize_item_name(item.name),
+                'count': sum(item.entries[2::3]),
+                'characters': {character_keys[item.entries[index]] for index in range(0, len(item.entries), 3)},
+                'locations': {location_names[item.entries[index + 1]] for index in range(0, len(item.entries), 3)}
+            }
+
+    def id_matches(self, item_id, value):
+        if item_id == COIN_ITEM_ID:
+            return value in item_id_label(item_id)
+        return item_id_label(item_id).startswith(value)
+
+    def name_matches(self, name, value):
+        if self.wildcards and re.search(r'[*?]', value) and not re.search(r'[\^$.+|{}\[\]()\\]', value):
+            pattern = '.*'.join('.'.join(re.escape(letters) for letters in part.split('?')) for part in normalize_item_name(value).split('*'))
+            return re.search(pattern, name) is not None
+        if re.search(r'[\^$.*+?|{}\[\]()\\]', value):
+            try:
+                return re.search(value.replace("'", "['`]"), name, re.IGNORECASE) is not None
+            except re.error:  # Invalid regexes match nothing
+                return False
+        return normalize_item_name(value) in name
+
+    def character_matches(self, character, value):
+        folded_value = value.casefold()
+        return (folded_value in (name.casefold() for name in configured_names(character))
+                or character[0].casefold().startswith(f'{folded_value} ('))
+
+    def account_matches(self, character, value):
+        for account, account_characters in self.config['accounts'].items():
+            if account.casefold() != value.casefold():
+                continue
+            if character == account_key(account):
+                return True
+            folded_names = {name.casefold() for name in configured_names(character)}
+            if any(account_character.casefold() in folded_names for account_character in account_characters):
+                return True
+        return False
+
+    def term_matches(self, item_id, node):
+        item = self.items[item_id]
+        if node[0] == 'count':
+            return {'<': item['count'] < node[2], '<=': item['count'] <= node[2], '>': item['count'] > node[2],
+                    '>=': item['count'] >= node[2], '=': item['count'] == node[2], '!=': item['count'] != node[2]}[node[1]]
+        _, field, value = node
+        if field == 'text':
+            return self.name_matches(item['name'], value) or self.id_matches(item_id, value)
+        if field == 'name':
+            return self.name_matches(item['name'], value)
+        if field == 'id':
+            if value.endswith('*'):
+                return self.id_matches(item_id, value[:-1])
+            if value.isdigit():
+                return item_id == int(value)
+            return item_id == COIN_ITEM_ID and value.casefold() in item_id_label(item_id).casefold()
+        if field == 'char':
+            return any(self.character_matches(character, value) for character in item['characters'])
+        if field == 'acct':
+            return any(self.account_matches(character, value) for character in item['characters'])
+        if field == 'loc':
+            return any(value.casefold() in location_keys(location) for location in item['locations'])
+        if field == 'server':
+            return any(character[1] and character[1].casefold() == value.casefold() for character in item['characters'])
+        raise ValueError(field)
+
+    def evaluate(self, node):
+        if node[0] == 'or':
+            return set().union(*(self.evaluate(child) for child in node[1]))
+        if node[0] == 'and':
+            return set(self.items).intersection(*(self.evaluate(child) for child in node[1]))
+        if node[0] == 'not':
+            return set(self.items) - self.evaluate(node[1])
+        return {item_id for item_id in self.items if self.term_matches(item_id, node)}
+
+
+class QueryParserTest(unittest.TestCase):
+
+    def test_structured_queries(self):
+        self.assertFalse(is_structured_query('Words of'))
+        self.assertFalse(is_structured_query('Lord`s ring'))
+        self.assertTrue(is_structured_query('rune AND ice'))
+        self.assertTrue(is_structured_query('count>5'))
+        self.assertTrue(is_structured_query('Ring char:Foo'))
+
+    def test_parse(self):
+        self.assertEqual(parse_query('Words of char:Foo'), ('and', [('term', 'text', 'Words of'), ('term', 'char', 'Foo')]))
+        self.assertEqual(parse_query('(Ring OR Earring) NOT char:Foo'),
+                         ('and', [('or', [('term', 'text', 'Ring'), ('term', 'text', 'Earring')]), ('not', ('term', 'char', 'Foo'))]))
+        self.assertEqual(parse_query('a OR b c AND d'),
+                         ('or', [('term', 'text', 'a'), ('and', [('term', 'text', 'b c'), ('term', 'text', 'd')])]))
+        self.assertEqual(parse_query('acct:"Main Account"'), ('term', 'acct', 'Main Account'))
+        self.assertEqual(parse_query('NAME:"^lord\'s" count>=20'), ('and', [('term', 'name', "^lord's"), ('count', '>=', 20)]))
+        self.assertEqual(parse_query('NOT NOT loc:worn'), ('not', ('not', ('term', 'loc', 'worn'))))
+
+    def test_invalid_queries(self):
+        for search_string in ['Ring AND', '(Ring', 'Ring)', 'OR Ring', 'name:', 'NOT', '()']:
+            with self.assertRaises(QueryError, msg=search_string):
+                parse_query(search_string)
+
+
+class GlobTest(unittest.TestCase):
+
+    def test_glob_parts(self):
+        self.assertEqual(glob_parts('Rune*of*ICE'), ['rune', 'of', 'ice'])
+        self.assertEqual(glob_parts('**ice*'), ['ice'])
+        self.assertEqual(glob_parts('*'), [])
+        self.assertEqual([part.pattern for part in glob_parts('r?ne*(a?)')], ['r.ne', r'\(a.\)'])
+
+    def test_glob_matches(self):
+        for search_string, name, matches in [
+            ('rune*ice', 'rune of ice', True),
+            ('ice*rune', 'rune of ice', False),  # Parts are found in order
+            ('r?ne', 'rune of ice', True),
+            ('r?ne', 'rne', False),  # ? is exactly one letter
+            ('of*of', 'words of power', False),  # Each part is found once, without overlapping
+            ('of*of', 'cloak of shadows of ice', True),
+            ('lord`s*', "lord's ring", True),
+            ('*', 'anything', True),
+            ('1.5*', 'rune 105', False)  # Only * and ? are wildcards
+        ]:
+            self.assertEqual(glob_matches(glob_parts(search_string), name), matches, (search_string, name))
+
+
+class QuerySearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        cls.config = generate_inventories(cls.work_dir, characters=10, items_per_character=60, catalog_size=300,
+                                          directories=1, servers=('pq', 'tk'), account_size=3, seed=3)
+        cls.inventory, load_result = load_inventory(cls.config)
+        cls.search_index = load_result['searchIndex']
+        cls.brute_force = BruteForceSearch(cls.inventory, cls.config)
+        cls.wildcard_brute_force = BruteForceSearch(cls.inventory, cls.config, wildcards=True)
+        cls.item_ids = sorted(cls.inventory)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+
+    def random_term(self, rng):
+        field = rng.choice(['text', 'text', 'text', 'name', 'id', 'char', 'acct', 'loc', 'server', 'count'])
+        if field == 'count':
+            return ('count', rng.choice(COUNT_OPERATORS), rng.choice([1, 5, 20, 100]))
+        if field in ('text', 'name'):
+            return ('term', field, rng.choice(TEXT_VALUES))
+        if field == 'id':
+            item_id = str(rng.choice(self.item_ids))
+            return ('term', 'id', rng.choice([item_id, item_id[:2] + '*', 'plat', '99999']))
+        values = {'char': CHARACTER_VALUES, 'acct': ACCOUNT_VALUES, 'loc': LOCATION_VALUES, 'server': SERVER_VALUES}[field]
+        return ('term', field, rng.choice(values))
+
+    def random_query(self, rng, depth=0):
+        roll = rng.random()
+        if depth >= 3 or roll < 0.4:
+            return self.random_term(rng)
+        if roll < 0.55:
+            return ('not', self.random_query(rng, depth + 1))
+        children = [self.random_query(rng, depth + 1) for _ in range(rng.randint(2, 3))]
+        return ('and' if roll < 0.8 else 'or', children)
+
+    def test_single_terms(self):
+        rng = random.Random(1)
+        for _ in range(300):
+            term = self.random_term(rng)
+            self.assertEqual(self.search_index.evaluate(term), self.brute_force.evaluate(term), term)
+            self.assertEqual(self.search_index.evaluate(term, wildcards=True), self.wildcard_brute_force.evaluate(term), term)
+
+    def test_wildcards_are_opt_in(self):
+        # Without wildcard search, * and ? keep their regex meaning
+        for search_string in ['colou?r', 'run?e', 'rune*ice', 'ice*']:
+            self.assertEqual(self.search_index.search(search_string), self.brute_force.evaluate(('term', 'text', search_string)), search_string)
+        self.assertEqual(self.search_index.search('rune*ice'), set())
+        self.assertTrue(self.search_index.search('rune*ice', wildcards=True))
+
+    def test_random_queries(self):
+        rng = random.Random(2)
+        for _ in range(2000):
+            query = self.random_query(rng)
+            search_string = render_query(query)
+            self.assertEqual(parse_query(search_string), query, search_string)
+            self.assertEqual(self.search_index.evaluate(query), self.brute_force.evaluate(query), search_string)
+            self.assertEqual(self.search_index.evaluate(query, wildcards=True), self.wildcard_brute_force.evaluate(query), search_string)
+
+    def test_narrowed_searches(self):
+        # Typing onto a search only checks its matches, which must find the same items as searching from scratch
+        rng = random.Random(4)
+        names = [self.inventory[item_id].name for item_id in rng.sample(self.item_ids, 20)] + ["Lord's", 'Lord`s Ring', '17', 'of ice']
+        for name in names:
+            search_string = ''
+            for character in name:
+                search_string = search_string[:-1] if search_string and rng.random() < 0.1 else search_string + character
+                narrowed_item_ids = self.search_index.search(search_string)
+                last_search = self.search_index.last_search
+                self.search_index.last_search = None
+                self.assertEqual(narrowed_item_ids, self.search_index.search(search_string), search_string)
+                self.search_index.last_search = last_search
+        self.search_index.last_search = None
+
+    def test_search(self):
+        for search_string in ['Words of char:Char001', '(ring OR boots) NOT loc:bank', 'loc:SharedBank count>5', 'server:tk NOT id:1*']:
+            self.assertEqual(self.search_index.search(search_string), self.brute_force.evaluate(parse_query(search_string)), search_string)
+        # Queries that can't be parsed yet, such as while typing, find nothing
+        self.assertEqual(self.search_index.search('ring AND'), set())
+
+
+if __name__ == '__main__':
+    unittest.main()